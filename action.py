@@ -3,6 +3,8 @@ from helpers import max_ships_to_spawn, max_flight_plan_len_for_ship_count
 
 
 class Action:
+    __slots__ = ("_action_type", "_command", "_num_ships", "_flight_plan")
+
     def __init__(self, action_type: str, command: str, num_ships: int, flight_plan: Optional[str]):
         self._action_type = action_type
         self._command = command
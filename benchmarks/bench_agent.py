@@ -0,0 +1,178 @@
+"""per-turn latency of rule_agent over recorded observations
+
+usage:
+    python benchmarks/bench_agent.py                        # report
+    python benchmarks/bench_agent.py --save baseline.json   # save a baseline
+    python benchmarks/bench_agent.py --check baseline.json --threshold 20
+    python benchmarks/bench_agent.py --record 1 --every 10  # record a corpus with the local referee
+    python benchmarks/bench_agent.py --instrument turns.csv # also dump instrument records (.csv or .jsonl)
+
+Turns are played through future_board with rule_agent's engine and Horizon (main.ENGINE, main.horizon), in corpus order.
+Each turn is split into the lookahead (Board + Info + Horizon), the simulation of future turns (run lazily by the first strategy that needs it)
+and the strategies of main.STRATEGIES without the simulation they triggered.
+--check fails (exit 1) when p95 or p99 of any game stage is more than threshold % slower than the baseline.
+Baselines are machine specific.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, List
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+import board_decorator
+import instrument
+import main as agent_main
+import referee
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "agent_turns.json")
+STAGES = [("early", 0, 100), ("mid", 100, 300), ("late", 300, 400)]
+TAIL = ["p95", "p99"]
+
+def percentile(values: List[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+def summarize(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": percentile(values, 0.5),
+        "p95": percentile(values, 0.95),
+        "p99": percentile(values, 0.99),
+        "max": max(values),
+        "mean": sum(values) / len(values),
+        "count": len(values)
+    }
+
+def phased_agent():
+    """rule_agent as configured in main, and the phases of its last turn"""
+    phases: Dict[str, float] = {}
+
+    def agent(board, info):
+        phases.clear()
+        board.sort_player_shipyards()
+        phases["simulate"] = info.simulation_time * 1000
+        for strategy in agent_main.STRATEGIES:
+            start = time.perf_counter()
+            simulation_time = info.simulation_time
+            strategy(board, info)
+            simulated = info.simulation_time - simulation_time
+            phases["simulate"] += simulated * 1000
+            phases[strategy.__name__] = (time.perf_counter() - start - simulated) * 1000
+
+    return board_decorator.future_board(agent, engine=agent_main.ENGINE, total_turn=agent_main.horizon()), phases
+
+def time_turn(agent, phases: Dict[str, float], obs: dict, config: dict) -> Dict[str, float]:
+    """elapsed ms of each phase"""
+    start = time.perf_counter()
+    agent(obs, config)
+    elapsed = (time.perf_counter() - start) * 1000
+    result = dict(phases)
+    result["lookahead"] = elapsed - sum(result.values())
+    return result
+
+def run(corpus: List[dict], repeat: int) -> dict:
+    totals = {name: [] for name, _, _ in STAGES}
+    phases = {name: {} for name, _, _ in STAGES}
+    agent, turn_phases = phased_agent()
+    for record in corpus:
+        obs, config = record["obs"], record["config"]
+        stage = next(name for name, start, stop in STAGES if start <= obs["step"] < stop)
+        # fastest of the repeats
+        best = min((time_turn(agent, turn_phases, obs, config) for _ in range(repeat)), key=lambda p: sum(p.values()))
+        totals[stage].append(sum(best.values()))
+        for phase, elapsed in best.items():
+            phases[stage].setdefault(phase, []).append(elapsed)
+
+    result = {}
+    for name, _, _ in STAGES:
+        if not totals[name]:
+            continue
+        result[name] = {
+            "total": summarize(totals[name]),
+            "phases": {phase: summarize(values) for phase, values in phases[name].items()}
+        }
+    return result
+
+def report(result: dict) -> None:
+    for stage, stats in result.items():
+        total = stats["total"]
+        print(f"{stage} ({total['count']} turns): p50 {total['p50']:.1f} ms, p95 {total['p95']:.1f} ms, " \
+            f"p99 {total['p99']:.1f} ms, max {total['max']:.1f} ms")
+        for phase, phase_stats in sorted(stats["phases"].items(), key=lambda item: -item[1]["mean"]):
+            print(f"    {phase:<10} mean {phase_stats['mean']:8.2f} ms  p95 {phase_stats['p95']:8.2f} ms")
+
+def regressions(result: dict, baseline: dict, threshold: float) -> List[str]:
+    failed = []
+    for stage, stats in baseline.items():
+        if stage not in result:
+            continue
+        for key in TAIL:
+            before, after = stats["total"][key], result[stage]["total"][key]
+            if after > before * (1 + threshold / 100):
+                failed.append(f"{stage} {key}: {before:.1f} ms -> {after:.1f} ms (+{(after / before - 1) * 100:.0f}%)")
+    return failed
+
+def record(games: int, every: int, seed: int, path: str) -> None:
+    """play rule_agent self-play games and keep every n-th turn of both players"""
+    corpus = []
+    def recording_agent(obs, config):
+        if obs["step"] % every == (every // 2) * obs["player"]:
+            corpus.append({"obs": obs, "config": config})
+        return agent_main.rule_agent(obs, config)
+
+    for i in range(games):
+        referee.play_game([recording_agent, recording_agent], seed + i)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(corpus, f)
+    print(f"{len(corpus)} turns -> {path}")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", default=None, help="save the result as a baseline")
+    parser.add_argument("--check", default=None, help="baseline to compare with")
+    parser.add_argument("--threshold", type=float, default=20, help="allowed tail regression (%%)")
+    parser.add_argument("--record", type=int, default=0, help="record a corpus from n games instead")
+    parser.add_argument("--every", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--instrument", default=None, help="dump instrument records (.csv or .jsonl)")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.record, args.every, args.seed, args.corpus)
+        return
+
+    with open(args.corpus) as f:
+        corpus = json.load(f)
+    if args.instrument:
+        instrument.enable()
+    result = run(corpus, args.repeat)
+    report(result)
+
+    if args.instrument:
+        recorder = instrument.disable()
+        if args.instrument.endswith(".csv"):
+            recorder.to_csv(args.instrument)
+        else:
+            recorder.to_jsonl(args.instrument)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(result, f, indent=1)
+
+    if args.check:
+        with open(args.check) as f:
+            baseline = json.load(f)
+        failed = regressions(result, baseline, args.threshold)
+        for message in failed:
+            print(f"REGRESSION {message}")
+        if failed:
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
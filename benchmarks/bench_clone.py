@@ -0,0 +1,54 @@
+"""Board.clone() vs deepcopy(Board) for boards with 0, 50 and 200 fleets
+
+usage: python benchmarks/bench_clone.py [--repeat N]
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+from copy import deepcopy
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from board import Board
+
+CONFIG = {
+    "agentTimeout": 60, "startingKore": 2750, "size": 21, "spawnCost": 10, "convertCost": 50,
+    "regenRate": 0.02, "maxRegenCellKore": 500, "randomSeed": 0, "episodeSteps": 400, "actTimeout": 3
+}
+
+def make_obs(num_fleets: int, num_shipyards: int = 10, seed: int = 0) -> dict:
+    rng = random.Random(seed)
+    size = CONFIG["size"]
+    cells = rng.sample(range(size * size), num_fleets + num_shipyards)
+    players = [[1000, {}, {}], [1000, {}, {}]]
+
+    for i, index in enumerate(cells[:num_shipyards]):
+        players[i % 2][1][f"0-{i}"] = [index, rng.randint(0, 100), rng.randint(0, 100)]
+
+    for i, index in enumerate(cells[num_shipyards:]):
+        plan = rng.choice("NESW") + str(rng.randint(1, 9)) + rng.choice("NESW")
+        players[i % 2][2][f"1-{i}"] = [index, rng.random() * 100, rng.randint(1, 100), rng.randint(0, 3), plan]
+
+    return {
+        "step": 100,
+        "player": 0,
+        "kore": [rng.random() * 500 for _ in range(size * size)],
+        "players": players,
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'fleets':>6} {'deepcopy [ms]':>14} {'clone [ms]':>11} {'speedup':>8}")
+    for num_fleets in (0, 50, 200):
+        board = Board(make_obs(num_fleets), CONFIG)
+        t_deepcopy = min(timeit.repeat(lambda: deepcopy(board), number=1, repeat=args.repeat))
+        t_clone = min(timeit.repeat(board.clone, number=1, repeat=args.repeat))
+        print(f"{num_fleets:>6} {t_deepcopy * 1000:>14.2f} {t_clone * 1000:>11.2f} {t_deepcopy / t_clone:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""memory of one future_board call (Board, lookahead over the horizon and the strategies of main.STRATEGIES)
+
+usage: python benchmarks/bench_memory.py [--engine array|object] [--every 4]
+
+For each game stage of the corpus: peak traced memory during the call and memory still held by Info after it.
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+from typing import Dict, List
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import board_decorator
+import main as agent_main
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus", "agent_turns.json")
+STAGES = [("early", 0, 100), ("mid", 100, 300), ("late", 300, 400)]
+
+def measure(obs: dict, config: dict, engine: str) -> Dict[str, float]:
+    """peak and retained KiB of one call"""
+    infos = []
+    def agent(board, info):
+        infos.append(info)
+        board.sort_player_shipyards()
+        for strategy in agent_main.STRATEGIES:
+            strategy(board, info)
+
+    # an untraced call first fills the caches shared across turns (compiled plans, ring tables)
+    board_decorator.future_board(agent, engine=engine)(obs, config)
+    infos.clear()
+    # a new decorator each call, so the last turn's Info is not reused
+    wrapped = board_decorator.future_board(agent, engine=engine)
+    gc.collect()
+    tracemalloc.start()
+    wrapped(obs, config)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    infos.clear()
+    return {"peak": peak / 1024, "retained": retained / 1024}
+
+def median(values: List[float]) -> float:
+    return sorted(values)[len(values) // 2]
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--corpus", default=CORPUS)
+    parser.add_argument("--engine", default="array", choices=["array", "object"])
+    parser.add_argument("--every", type=int, default=4, help="use every n-th turn of the corpus")
+    args = parser.parse_args()
+
+    with open(args.corpus) as f:
+        corpus = json.load(f)[::args.every]
+    for name, start, stop in STAGES:
+        results = [
+            measure(record["obs"], record["config"], args.engine)
+            for record in corpus if start <= record["obs"]["step"] < stop
+        ]
+        if not results:
+            continue
+        peak = [result["peak"] for result in results]
+        retained = [result["retained"] for result in results]
+        print(f"{name} ({len(results)} turns, {args.engine}): peak median {median(peak):.0f} KiB, max {max(peak):.0f} KiB, " \
+            f"held by Info median {median(retained):.0f} KiB")
+
+if __name__ == "__main__":
+    main()
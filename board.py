@@ -1,11 +1,11 @@
 from collections import defaultdict
-from copy import deepcopy
 from typing import Generator, Dict, List, Optional, Tuple
 from cell import Field, Route
 from configuration import Configuration
 from piece import Fleet, Shipyard
 from point import Direction
 from player import Player
+from simulator import ArrayState
 from helpers import (
     max_flight_plan_len_for_ship_count, 
     collection_rate_for_ship_count, 
@@ -15,6 +15,9 @@ from helpers import (
     group_by
 )
 
+# N, E, S, W
+ADJACENT_OFFSETS = [(0, -1), (1, 0), (0, 1), (-1, 0)]
+
 class Board:
     def __init__(self, obs, config):
         self._config = Configuration(config)
@@ -51,7 +54,7 @@ class Board:
 
         # fleet route
         for fleet in self.fleets.values():
-            fleet._route = Route.from_str(fleet.point, self.field, fleet.flight_plan, fleet.direction)
+            fleet._route = Route.from_plan(fleet.point, self.field, fleet.plan, fleet.direction)
         
         # fleet to convert
         convert_point = []
@@ -93,6 +96,11 @@ class Board:
     def steps_left(self) -> int:
         return 400 - self._step
 
+    @property
+    def remaining_overage_time(self) -> float:
+        """overage time (seconds) left to the current player"""
+        return self._obs.get("remainingOverageTime", 60)
+
     @property
     def players(self) -> Dict[str, Player]:
         return self._players
@@ -119,6 +127,52 @@ class Board:
     def field(self) -> Field:
         return self._field
     
+    def clone(self) -> "Board":
+        """copy of the mutable game state (configuration and observation are shared)"""
+        shipyard_map = {}
+        fleet_map = {}
+
+        def clone_shipyard(shipyard: Shipyard) -> Shipyard:
+            if id(shipyard) not in shipyard_map:
+                shipyard_map[id(shipyard)] = shipyard.clone()
+            return shipyard_map[id(shipyard)]
+
+        def clone_fleet(fleet: Fleet) -> Fleet:
+            if id(fleet) not in fleet_map:
+                fleet_map[id(fleet)] = fleet.clone()
+            return fleet_map[id(fleet)]
+
+        def clone_pieces(pieces, clone_piece):
+            if isinstance(pieces, dict):
+                return {key: clone_piece(piece) for key, piece in pieces.items()}
+            return [clone_piece(piece) for piece in pieces]
+
+        board = Board.__new__(Board)
+        board._config = self._config
+        board._obs = self._obs
+        board._step = self._step
+        board._shipyards = clone_pieces(self._shipyards, clone_shipyard)
+        board._fleets = clone_pieces(self._fleets, clone_fleet)
+        board._players = {
+            player_id: player.clone(
+                clone_pieces(player._shipyards, clone_shipyard), 
+                clone_pieces(player._fleets, clone_fleet)
+            )
+            for player_id, player in self._players.items()
+        }
+        board._field = self._field.clone(clone_shipyard, clone_fleet)
+
+        # cross references between pieces
+        for fleet in list(fleet_map.values()):
+            if fleet._convert_attack:
+                fleet._convert_attack = [clone_fleet(f) for f in fleet._convert_attack]
+        for shipyard in list(shipyard_map.values()):
+            scratch = shipyard._scratch
+            if scratch is not None:
+                scratch.incoming_allied_fleets = [clone_fleet(f) for f in scratch.incoming_allied_fleets]
+                scratch.incoming_hostile_fleets = [clone_fleet(f) for f in scratch.incoming_hostile_fleets]
+        return board
+
     def sort_player_shipyards(self) -> None:
         """sort shipyards by distance"""
         me = self.current_player
@@ -160,8 +214,15 @@ class Board:
         if fleet_cell is not None and fleet_cell.id == fleet.id:
             self._field[fleet.point.to_tuple()]._fleet = None
     
-    def next(self) -> Generator["Board", None, None]:
-        board = deepcopy(self)
+    def next(self, engine: str = "object") -> Generator["Board", None, None]:
+        """engine: 'object' (Fleet/Shipyard objects) or 'array' (simulator.ArrayState)"""
+        assert engine in {"object", "array"}, f"{engine} is invalid engine"
+        board = self.clone()
+        if engine == "array":
+            yield board
+            yield from ArrayState.from_board(board).boards(board)
+            return
+
         convert_cost = board.configuration.convert_cost
         spawn_cost = board.configuration.spawn_cost
         size = board.configuration.size
@@ -174,22 +235,16 @@ class Board:
             def create_uid():
                 nonlocal uid_counter
                 uid_counter += 1
-                return f"{self.step + 1}-{uid_counter}"
-            
-            def find_first_non_digit(flight_plan: str):
-                for i in range(len(flight_plan)):
-                    if not flight_plan[i].isdigit():
-                        return i
-                return len(flight_plan) + 1
+                return f"{board.step + 1}-{uid_counter}"
             
-            for i in range(size ** 2):
-                x, y = from_index(i, size)
-                board._field[x, y]._adjacent_fleets.clear()
+            for x in range(size):
+                for y in range(size):
+                    board._field[x, y]._adjacent_fleets.clear()
 
             for player in board.players.values():
                 # Shipyard action
                 for shipyard in player.shipyards:
-                    if shipyard.next_action is None or shipyard.ship_count == 0:
+                    if shipyard.next_action is None or shipyard.next_action.num_ships == 0:
                         pass
                     # Spawn ships
                     elif (shipyard.next_action.action_type == "SPAWN"
@@ -217,12 +272,8 @@ class Board:
                     shipyard._turns_controlled += 1
                 
                 for fleet in list(player.fleets):
-                    while fleet.flight_plan and fleet.flight_plan[0] == "0":
-                        fleet._flight_plan = fleet.flight_plan[1:]
-                    
                     # convert
-                    if (fleet.flight_plan 
-                            and fleet.flight_plan[0] == "C" 
+                    if (fleet.plan_convert
                             and fleet.ship_count >= convert_cost 
                             and board._field[fleet.point.to_tuple()].shipyard is None):
                         player._kore += fleet.kore
@@ -232,21 +283,8 @@ class Board:
                         board._delete_fleet(fleet)
                         continue
 
-                    while fleet.flight_plan and fleet.flight_plan[0] == "C":
-                        fleet._flight_plan = fleet.flight_plan[1:]
-                    
                     # move
-                    if fleet.flight_plan and fleet.flight_plan[0].isalpha():
-                        fleet._direction = fleet.flight_plan[0]
-                        fleet._flight_plan = fleet.flight_plan[1:]
-                    elif fleet.flight_plan:
-                        idx = find_first_non_digit(fleet.flight_plan)
-                        digits = int(fleet.flight_plan[:idx])
-                        digits -= 1
-                        if digits > 0:
-                            fleet._flight_plan = str(digits) + fleet.flight_plan[idx:]
-                        else:
-                            fleet._flight_plan = fleet.flight_plan[idx:]
+                    fleet.advance_plan()
                     
                     board._field[fleet.point.to_tuple()]._fleet = None
                     fleet.move(fleet.direction)
@@ -293,11 +331,9 @@ class Board:
                     else:
                         board._field[fleet.point.to_tuple()]._kore += fleet.kore
             
+            # at most one fleet per cell after collisions, cells point to it
             for shipyard in list(board.shipyards.values()):
-                fleet = None
-                for _fleet in board.fleets.values():
-                    if shipyard.x == _fleet.x and shipyard.y == _fleet.y:
-                        fleet = _fleet
+                fleet = board._field[shipyard.x, shipyard.y]._fleet
                 if fleet is not None and fleet.player_id != shipyard.player_id:
                     if fleet.ship_count > shipyard.ship_count:
                         count = fleet.ship_count - shipyard.ship_count
@@ -317,14 +353,13 @@ class Board:
                     board._delete_fleet(fleet)
 
             for fleet in board.fleets.values():
-                for point in fleet.point.adjacent_point:
-                    board.field[point.to_tuple()]._adjacent_fleets.append(fleet)
+                for dx, dy in ADJACENT_OFFSETS:
+                    board._field[fleet.x + dx, fleet.y + dy]._adjacent_fleets.append(fleet)
 
             incoming_fleet_dmg = defaultdict(lambda: defaultdict(int))
             for fleet in board.fleets.values():
-                for direction in {"N", "E", "S", "W"}:
-                    dx, dy = Direction.next_position(direction)
-                    adjacent_fleet = board._field[fleet.x + dx, fleet.y + dy].fleet
+                for dx, dy in ADJACENT_OFFSETS:
+                    adjacent_fleet = board._field[fleet.x + dx, fleet.y + dy]._fleet
                     if adjacent_fleet is not None and adjacent_fleet.player_id != fleet.player_id:
                         incoming_fleet_dmg[adjacent_fleet.id][fleet.id] = fleet.ship_count
             
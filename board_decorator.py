@@ -1,101 +1,290 @@
-from collections import defaultdict
-from copy import deepcopy
+from collections import OrderedDict, defaultdict
 from functools import wraps
 import numpy as np
-from typing import Dict, List, Optional, Set
+import time
+from typing import Dict, Hashable, Iterator, List, Optional, Set, Tuple, Union
 from board import Board
 from configuration import Configuration
 from cell import Field
 from player import Player
+from snapshot import FieldHistory, FutureTensors
+from territory import Territory
+
+class PlanScores:
+    """
+    scores of plans in one turn (FlightPlan.expected_total_assets, future_damage), the oldest dropped beyond maxsize
+    stats: [hits, misses, evictions] since the last clear
+    """
+    def __init__(self, maxsize: int = 1 << 15):
+        self.maxsize = maxsize
+        self._scores: OrderedDict = OrderedDict()
+        self._stats = [0, 0, 0]
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+    def get(self, key: Hashable):
+        """None if not stored"""
+        value = self._scores.get(key)
+        self._stats[value is None] += 1
+        return value
+
+    def put(self, key: Hashable, value) -> None:
+        self._scores[key] = value
+        if len(self._scores) > self.maxsize:
+            self._scores.popitem(last=False)
+            self._stats[2] += 1
+
+    @property
+    def stats(self) -> Tuple[int, int, int]:
+        return tuple(self._stats)
+
+    def clear(self) -> None:
+        self._scores.clear()
+        self._stats = [0, 0, 0]
 
 class Info:
-    def __init__(self, config: Configuration):
+    """
+    future of the board, simulated lazily up to total_turn
+    boards: Board.next() generator, the current board is taken immediately
+            so that actions decided later are not simulated
+    """
+    def __init__(self, config: Configuration, boards: Optional[Iterator[Board]] = None, *, total_turn: int = 20):
         self._allied_fleet_position = set()
         self._incoming_hostile_fleet_power = defaultdict(int)
-        self._future_field: Dict[int, Field] = {}
-        self._player_kore: Dict[int, Dict[str, float]] = {}
-        self._shipyard_count: Dict[int, Dict[str, int]] = {}
-        self._field_kore: Dict[int, float] = {}
-        self._field_damage: Dict[int, np.ndarray] = {}
+        self._future_field = FieldHistory(config.size)
+        self._tensors = FutureTensors(config.size, total_turn + 1)
         self.config = config
+        self._total_turn = total_turn
+        self._boards = boards
+        self._simulation_time = 0.0
+        self._simulated_turns = 0
+        self._step: Optional[int] = None
+        self._player_id: Optional[int] = None
+        self._territory: Optional[Territory] = None
+        self._territory_board: Optional[Board] = None
+        self._plan_scores = PlanScores()
+        if boards is not None:
+            board = next(boards)
+            self._step = board.step
+            self._player_id = board.current_player.player_id
+            self._tensors.add(0, board)
     
     @property
     def total_turn(self) -> int:
-        """calculation turn"""
-        return len(self._future_field)
-    
-    def future_field(self, *, turn: int = -1) -> Optional[Field]:
-        assert isinstance(turn, int), f"turn must be integer"
-        try:
-            return self._future_field[turn]
-        except KeyError:
-            return None
-    
-    def player_kore(self, *, turn: int = -1) -> Dict[str, float]:
-        return self._player_kore[turn]
+        """maximum calculation turn"""
+        return self._total_turn
     
-    def shipyard_count(self, *, turn: int = -1) -> Dict[str, int]:
-        return self._shipyard_count[turn]
+    def extend(self, total_turn: int) -> None:
+        """raise the maximum calculation turn"""
+        self._total_turn = max(self._total_turn, total_turn)
     
-    def field_kore(self, *, turn: int = -1) -> float:
-        """average kore"""
-        return self._field_kore[turn]
+    @property
+    def simulated_turns(self) -> int:
+        """turns simulated for this turn (reused turns are not counted)"""
+        return self._simulated_turns
+
+    @property
+    def simulation_time(self) -> float:
+        """seconds spent in simulate"""
+        return self._simulation_time
+
+    def simulate(self, turn: int) -> None:
+        """simulate up to the turn (memoized)"""
+        turn = min(turn, self._total_turn)
+        if self._boards is None or len(self._future_field) >= turn:
+            return
+        start = time.perf_counter()
+        while len(self._future_field) < turn:
+            board = next(self._boards)
+            i = len(self._future_field) + 1
+            self.add_future_field(board, i)
+            self._tensors.add(i, board)
+            self._simulated_turns += 1
+        self._simulation_time += time.perf_counter() - start
     
-    def field_damage(self, *, turn: int = -1) -> np.ndarray:
-        return self._field_damage[turn]
+    def predicts(self, board: Board) -> bool:
+        """whether board (next turn's observation) is the simulated turn 1"""
+        if self._boards is None or board.step != self._step + 1 or board.current_player.player_id != self._player_id:
+            return False
+        self.simulate(1)
+        field = self._future_field.field(1)
+        if field is None:
+            return False
+        if any(player.kore != self._tensors.player_kore[1, player_id] for player_id, player in board.players.items()):
+            return False
+        if not np.array_equal(field.kore_array(), board.field.kore_array()):
+            return False
+
+        def shipyard_key(shipyard):
+            return shipyard.id, shipyard.player_id, shipyard.x, shipyard.y, shipyard.ship_count, shipyard.turns_controlled
+        def fleet_key(fleet):
+            return fleet.id, fleet.player_id, fleet.x, fleet.y, fleet.ship_count, fleet.kore, fleet.direction, fleet.flight_plan
+        return (
+            sorted(map(shipyard_key, field._shipyards)) == sorted(map(shipyard_key, board.shipyards.values()))
+            and sorted(map(fleet_key, field._fleets)) == sorted(map(fleet_key, board.fleets.values()))
+        )
+
+    def advance(self, board: Board, *, total_turn: Optional[int] = None) -> bool:
+        """
+        reuse the simulation for next turn's board, turn t becomes turn t - 1
+        False (and nothing changes) if the board differs from the simulated turn 1
+        """
+        if not self.predicts(board):
+            return False
+        self._future_field.shift()
+        self._tensors.shift()
+        self._step += 1
+        # turns already simulated are kept even if the horizon is shorter now
+        self._total_turn = max(self._total_turn if total_turn is None else total_turn, len(self._future_field))
+        self._simulation_time = 0.0
+        self._simulated_turns = 0
+        self._territory = self._territory_board = None
+        self._plan_scores.clear()
+        return True
+
+    def _simulated(self, turn: int) -> Optional[int]:
+        """simulate up to the turn (-1: total_turn), None if the turn is not simulated"""
+        assert isinstance(turn, int), f"turn must be integer"
+        turn = self._total_turn if turn == -1 else turn
+        self.simulate(turn)
+        return turn if 0 <= turn < len(self._tensors) else None
+
+    def future_field(self, *, turn: int = -1) -> Optional[Field]:
+        turn = self._simulated(turn)
+        return None if turn is None else self._future_field.field(turn)
     
-    def add_future_field(self, board: Board, turn: int) -> None:
-        self._future_field[turn] = deepcopy(board.field)
+    def player_kore(self, *, turn: int = -1) -> Optional[Dict[int, float]]:
+        """row of FutureTensors.player_kore by player id"""
+        turn = self._simulated(turn)
+        if turn is None:
+            return None
+        return {player_id: float(kore) for player_id, kore in enumerate(self._tensors.player_kore[turn])}
     
-    def add_player_kore(self, board: Board, turn: int) -> None:
-        self._player_kore[turn] = {}
-        for player_id, player in board.players.items():
-            self._player_kore[turn][player_id] = player.kore
+    def shipyard_count(self, *, turn: int = -1) -> Optional[Dict[int, int]]:
+        """row of FutureTensors.shipyard_count by player id"""
+        turn = self._simulated(turn)
+        if turn is None:
+            return None
+        return {player_id: int(count) for player_id, count in enumerate(self._tensors.shipyard_count[turn])}
     
-    def add_shipyard_count(self, board: Board, turn: int) -> None:
-        self._shipyard_count[turn] = {}
-        for player_id, player in board.players.items():
-            self._shipyard_count[turn][player_id] = len(player.shipyards)
-        
-    def add_field_kore(self, board: Board, turn: int) -> None:
-        size = board.configuration.size
-        kore = 0
-        for x in range(size):
-            for y in range(size):
-                if board.field[x, y].shipyard is None:
-                    kore += board.field[x, y].kore
-        self._field_kore[turn] = kore / size / size
+    def field_kore(self, *, turn: int = -1) -> Optional[float]:
+        """average kore (FutureTensors.field_kore)"""
+        turn = self._simulated(turn)
+        return None if turn is None else float(self._tensors.field_kore[turn])
     
-    def add_field_damage(self, board: Board, turn: int) -> None:
-        size = board.configuration.size
-        field = np.zeros((size, size), dtype=np.int8)
-
-        for fleet in board.opponent_player.fleets:
-            field[fleet.x, fleet.y] += fleet.ship_count
-            for dx, dy in {(0, 1), (0, -1), (1, 0), (-1, 0)}:
-                next_x, next_y = (fleet.x + dx) % size, (fleet.y + dy) % size
-                field[next_x, next_y] += fleet.ship_count
-        self._field_damage[turn] = field
-
-def future_board(agent) -> Dict[str, str]:
+    def tensors(self, *, turn: Optional[int] = None) -> FutureTensors:
+        """stacked arrays of turns 0..turn (default: total_turn)"""
+        self.simulate(self._total_turn if turn is None else turn)
+        return self._tensors
+
+    @property
+    def plan_scores(self) -> PlanScores:
+        """plan scores of this turn, cleared with the turn"""
+        return self._plan_scores
+
+    def territory(self, board: Board) -> Territory:
+        """reach-time map of the board (the current board of this Info), built once per board and horizon"""
+        if self._territory is None or self._territory_board is not board or self._territory.total_turn != self._total_turn:
+            self._territory = Territory(board, self.tensors().shipyard_ships, self._total_turn)
+            self._territory_board = board
+        return self._territory
+
+    def add_future_field(self, board: Board, turn: int) -> None:
+        self._future_field.add(turn, board.field)
+
+# [hits, misses] of reusing the last turn's Info
+REUSE_STATS = [0, 0]
+
+def lookahead(board: Board, *, engine: str = "object", turns: int = 20, previous: Optional[Info] = None) -> Info:
+    """
+    Info of the board, turns 1..turns are simulated on first access
+    previous: Info of the last turn, reused when it predicted this board
+    """
+    if previous is not None:
+        reused = previous.advance(board, total_turn=turns)
+        REUSE_STATS[not reused] += 1
+        if reused:
+            return previous
+    return Info(board.configuration, board.next(engine=engine), total_turn=turns)
+
+class Horizon:
+    """
+    lookahead depth chosen every turn from the time budget
+
+    budget: share of actTimeout the agent may use, reduced when the overage time runs low
+    The cost of a simulated turn and of the rest of the agent are measured (moving average),
+    so the depth is deepened up to maximum when there is slack and cut down to minimum otherwise.
+    """
+    def __init__(self, *, default: int = 20, minimum: int = 5, maximum: int = 20,
+                 budget: float = 0.5, min_overage: float = 10, smoothing: float = 0.3):
+        assert 1 <= minimum <= default <= maximum, f"{minimum} <= {default} <= {maximum} is not satisfied"
+        assert 0 < budget <= 1, f"budget {budget} is out of range"
+        self.default = default
+        self.minimum = minimum
+        self.maximum = maximum
+        self.budget = budget
+        self.min_overage = min_overage
+        self.smoothing = smoothing
+        self._turn_cost: Optional[float] = None
+        self._other_cost: float = 0.0
+        self._last = default
+
+    @property
+    def turn_cost(self) -> Optional[float]:
+        """seconds per simulated turn"""
+        return self._turn_cost
+
+    @property
+    def last(self) -> int:
+        return self._last
+
+    def choose(self, board: Board) -> int:
+        if self._turn_cost is None:
+            self._last = self.default
+            return self._last
+        budget = board.configuration.act_timeout * self.budget
+        overage = board.remaining_overage_time
+        if overage < self.min_overage:
+            budget *= max(overage, 0) / self.min_overage
+        turns = int((budget - self._other_cost) / self._turn_cost)
+        self._last = max(self.minimum, min(self.maximum, turns))
+        return self._last
+
+    def update(self, info: Info, elapsed: float) -> None:
+        """elapsed: seconds of the whole turn"""
+        def average(before: Optional[float], value: float) -> float:
+            return value if before is None else before + self.smoothing * (value - before)
+
+        if info.simulated_turns > 0:
+            self._turn_cost = average(self._turn_cost, info.simulation_time / info.simulated_turns)
+        self._other_cost = average(self._other_cost, max(elapsed - info.simulation_time, 0))
+
+def future_board(agent=None, *, engine: str = "object", total_turn: Union[int, Horizon] = 20) -> Dict[str, str]:
+    """
+    engine: simulation engine passed to Board.next ('object' or 'array')
+    total_turn: maximum turn Info simulates, or Horizon to choose it every turn
+    """
+    if agent is None:
+        return lambda agent: future_board(agent, engine=engine, total_turn=total_turn)
+
+    # last Info of each player
+    previous: Dict[int, Info] = {}
+
     @wraps(agent)
     def wrapper(obs, config):
+        start = time.perf_counter()
         board: Board = Board(obs, config)
         me: Player = board.current_player
-        info: Info = Info(board.configuration)
-
-        # calculate board after 20 turns
-        for i, _board in enumerate(board.next()):
-            if i > 0:
-                info.add_future_field(_board, i)
-                info.add_player_kore(_board, i)
-                info.add_shipyard_count(_board, i)
-                info.add_field_kore(_board, i)
-                info.add_field_damage(_board, i)
-
-            if i == 20:
-                break
+        horizon = total_turn if isinstance(total_turn, Horizon) else None
+        turns = horizon.choose(board) if horizon is not None else total_turn
+
+        # board after 1..turns turns, calculated on demand
+        info: Info = lookahead(board, engine=engine, turns=turns, previous=previous.get(me.player_id))
+        previous[me.player_id] = info
         
         agent(board, info)
+        if horizon is not None:
+            horizon.update(info, time.perf_counter() - start)
         return me.next_actions
-    return wrapper
\ No newline at end of file
+    return wrapper
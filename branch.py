@@ -0,0 +1,77 @@
+# 分岐シミュレーション (what-if)
+
+from typing import Dict, List, Optional
+from action import Action
+from board import Board
+
+class Branch:
+    """
+    simulated state that can be advanced with candidate actions and forked at any turn
+
+    ex)
+        base = Branch(board).run(3)
+        attack = base.step({shipyard.id: Action.launch(num_ships=21, flight_plan="N3E")})
+        spawn = base.step({shipyard.id: Action.spawn(num_ships=5, turns_controlled=10)})
+
+    Branches are never modified, so forks share their common prefix (parent branches).
+    The root board's own next_action are applied together with the actions of the first step.
+    """
+    def __init__(self, board: Board, *, engine: str = "object", turn: int = 0, parent: Optional["Branch"] = None):
+        assert engine in {"object", "array"}, f"{engine} is invalid engine"
+        self._board = board
+        self._engine = engine
+        self._turn = turn
+        self._parent = parent
+
+    @property
+    def board(self) -> Board:
+        return self._board
+
+    @property
+    def turn(self) -> int:
+        """turns simulated from the root"""
+        return self._turn
+
+    @property
+    def parent(self) -> Optional["Branch"]:
+        return self._parent
+
+    def step(self, actions: Optional[Dict[str, Action]] = None) -> "Branch":
+        """next turn after applying actions (shipyard id -> action)"""
+        generator = self._board.next(engine=self._engine)
+        board = next(generator)
+        for shipyard_id, action in (actions or {}).items():
+            assert shipyard_id in board.shipyards, f"{shipyard_id} is not found"
+            board.shipyards[shipyard_id].next_action = action
+        return Branch(next(generator), engine=self._engine, turn=self._turn + 1, parent=self)
+
+    def run(self, turns: int, actions: Optional[Dict[int, Dict[str, Action]]] = None) -> "Branch":
+        """
+        advance turns
+        actions: turn offset from this branch (0: first step) -> shipyard id -> action
+        """
+        actions = actions or {}
+        branch = self
+        for i in range(turns):
+            branch = branch.step(actions.get(i))
+        return branch
+
+    def at(self, turn: int) -> "Branch":
+        """ancestor (or self) at the turn"""
+        assert 0 <= turn <= self._turn, f"turn {turn} is out of range"
+        branch = self
+        while branch.turn > turn:
+            branch = branch.parent
+        return branch
+
+    def boards(self) -> List[Board]:
+        """boards from the root to this branch"""
+        boards = []
+        branch = self
+        while branch is not None:
+            boards.append(branch.board)
+            branch = branch.parent
+        return boards[::-1]
+
+    def __repr__(self):
+        return f"Branch(turn={self._turn}, step={self._board.step}, engine={self._engine})"
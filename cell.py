@@ -1,9 +1,14 @@
-from typing import Generator, List, Optional, Tuple
-from point import Direction, Point
+from functools import lru_cache
+import numpy as np
+from typing import Callable, Dict, FrozenSet, Generator, List, Optional, Tuple
+from point import Point
+from compiled_plan import DX, DY, CompiledPlan
 from piece import Fleet, Shipyard
 from helpers import cached_property
 
 class Cell:
+    __slots__ = ("_point", "_kore", "_shipyard", "_fleet", "_adjacent_fleets")
+
     def __init__(self, x: int, y: int, kore: float, shipyard: Optional[Shipyard], fleet: Optional[Fleet], size: int):
         self._point = Point(x, y, size)
         self._kore = kore
@@ -11,6 +16,16 @@ class Cell:
         self._fleet = fleet
         self._adjacent_fleets = []
     
+    def clone(self, shipyard: Optional[Shipyard], fleet: Optional[Fleet], adjacent_fleets: List[Fleet]) -> "Cell":
+        """copy with the given (already cloned) pieces; the point is shared"""
+        cell = Cell.__new__(Cell)
+        cell._point = self._point
+        cell._kore = self._kore
+        cell._shipyard = shipyard
+        cell._fleet = fleet
+        cell._adjacent_fleets = adjacent_fleets
+        return cell
+    
     @property
     def point(self) -> Point:
         return self._point
@@ -63,11 +78,48 @@ class Cell:
         else:
             return f"Cell(x={self.x}, y={self.y}, kore={self._kore})"
 
+# (size, radius) -> ring around each cell (by Point.index), in the order of the rotations below
+_RING_INDICES: Dict[Tuple[int, int], np.ndarray] = {}
+_RING_POSITIONS: Dict[Tuple[int, int], List[List[Tuple[int, int]]]] = {}
+
+def ring_indices(size: int, radius: int) -> np.ndarray:
+    """(size * size, 4 * radius) flat indices of the cells radius away (wrapped cells repeat)"""
+    try:
+        return _RING_INDICES[size, radius]
+    except KeyError:
+        pass
+    offsets = []
+    for dx in range(radius):
+        dy = radius - abs(dx)
+        # 90 degree rotation
+        for _ in range(4):
+            offsets.append((dx, dy))
+            dx, dy = -dy, dx
+    dx, dy = np.array(offsets, dtype=np.int64).reshape(-1, 2).T
+    x, y = np.divmod(np.arange(size * size), size)
+    ring = (x[:, None] + dx) % size * size + (y[:, None] + dy) % size
+    _RING_INDICES[size, radius] = ring
+    return ring
+
+def ring_positions(size: int, radius: int) -> List[List[Tuple[int, int]]]:
+    """ring_indices as (x, y)"""
+    try:
+        return _RING_POSITIONS[size, radius]
+    except KeyError:
+        pass
+    positions = [[divmod(index, size) for index in ring] for ring in ring_indices(size, radius).tolist()]
+    _RING_POSITIONS[size, radius] = positions
+    return positions
+
 class Field:
     def __init__(self, size: int):
         self._size = size
         self._shipyards: List[Shipyard] = []
         self._fleets: List[Fleet] = []
+        # (kind, player_id) -> (pieces, closest, distance), see _nearest
+        self._nearest_index: Dict[Tuple[str, Optional[int]], tuple] = {}
+        # (shipyards, flat indices of their points), see shipyard_layout
+        self._layout: Optional[Tuple[List[Shipyard], FrozenSet[int]]] = None
 
         self._position = [[None] * size for _ in range(size)]
         for x in range(size):
@@ -82,98 +134,98 @@ class Field:
     def size(self) -> int:
         return self._size
     
+    def clone(self, shipyards: Callable[[Shipyard], Shipyard], fleets: Callable[[Fleet], Fleet]) -> "Field":
+        """copy whose pieces are replaced by shipyards(shipyard) and fleets(fleet)"""
+        field = Field.__new__(Field)
+        field._size = self._size
+        field._shipyards = [shipyards(shipyard) for shipyard in self._shipyards]
+        field._fleets = [fleets(fleet) for fleet in self._fleets]
+        field._nearest_index = {}
+        field._layout = None
+        field._position = [
+            [
+                cell.clone(
+                    cell._shipyard and shipyards(cell._shipyard),
+                    cell._fleet and fleets(cell._fleet),
+                    [fleets(fleet) for fleet in cell._adjacent_fleets]
+                )
+                for cell in column
+            ]
+            for column in self._position
+        ]
+        return field
+    
+    def kore_array(self) -> np.ndarray:
+        return np.array([[cell.kore for cell in column] for column in self._position], dtype=np.float64)
+    
+    def adjacent_fleet_map(self) -> Dict[Tuple[int, int], List[Fleet]]:
+        return {
+            (cell.x, cell.y): cell.adjacent_fleets
+            for column in self._position for cell in column if cell.adjacent_fleets
+        }
+    
+    def ring_indices(self, point: Point, start: int, stop: int, step: int = 1) -> np.ndarray:
+        """flat indices (x * size + y) of surrounding_cells(point, start, stop, step) in the same order"""
+        assert start >= 1
+        rings = [ring_indices(self._size, r)[point.index] for r in range(start, stop, step)]
+        return np.concatenate(rings) if rings else np.zeros(0, dtype=np.int64)
+
     def surrounding_cells(self, point: Point, start: int, stop: int, step: int = 1) -> Generator[Cell, None, None]:
         assert start >= 1
         for r in range(start, stop, step):
-            for dx in range(r):
-                dy = r - abs(dx)
-                # 90 degree rotation
-                yield self[point.x + dx, point.y + dy]
-
-                dx, dy = -dy, dx
-                yield self[point.x + dx, point.y + dy]
-
-                dx, dy = -dy, dx
-                yield self[point.x + dx, point.y + dy]
-
-                dx, dy = -dy, dx
-                yield self[point.x + dx, point.y + dy]
+            for position in ring_positions(self._size, r)[point.index]:
+                yield self[position]
     
     def cells_away(self, point: Point, distance: int) -> Generator[Cell, None, None]:
         assert int(distance) > 0, "distance must be positive"
-        for dx in range(distance):
-            dy = distance - abs(dx)
-            # 90 degree rotation
-            yield self[point.x + dx, point.y + dy]
+        for position in ring_positions(self._size, distance)[point.index]:
+            yield self[position]
+    
+    def shipyard_layout(self) -> FrozenSet[int]:
+        """flat indices (Point.index) of the shipyards, built once per shipyard list"""
+        if self._layout is None or self._layout[0] is not self._shipyards:
+            self._layout = (self._shipyards, frozenset(shipyard.point.index for shipyard in self._shipyards))
+        return self._layout[1]
 
-            dx, dy = -dy, dx
-            yield self[point.x + dx, point.y + dy]
+    def _nearest(self, kind: str, player_id: Optional[int]) -> Tuple[list, List[int]]:
+        """
+        closest shipyard or fleet of the player from each cell (by Point.index) and its distance
+        distance 0 is excluded, the first of the list wins ties, (None, size) if nothing is closer than size
+        built once per piece list (the lists are replaced when pieces change)
+        """
+        pieces = self._shipyards if kind == "shipyard" else self._fleets
+        cached = self._nearest_index.get((kind, player_id))
+        if cached is not None and cached[0] is pieces:
+            return cached[1], cached[2]
 
-            dx, dy = -dy, dx
-            yield self[point.x + dx, point.y + dy]
+        size = self._size
+        candidates = [piece for piece in pieces if player_id is None or piece.player_id == player_id]
+        if candidates:
+            distance = Point.distance_matrix(size)[:, [piece.point.index for piece in candidates]]
+            distance = np.where(distance == 0, size, distance)
+            nearest = distance.argmin(axis=1)
+            nearest_distance = distance[np.arange(size * size), nearest].tolist()
+            closest = [
+                candidates[i] if d < size else None
+                for i, d in zip(nearest.tolist(), nearest_distance)
+            ]
+        else:
+            closest = [None] * (size * size)
+            nearest_distance = [size] * (size * size)
+        self._nearest_index[kind, player_id] = (pieces, closest, nearest_distance)
+        return closest, nearest_distance
 
-            dx, dy = -dy, dx
-            yield self[point.x + dx, point.y + dy]
-    
     def closest_shipyard(self, point: Point, player_id: Optional[int]) -> Optional[Shipyard]:
         assert player_id is None or player_id in {0, 1}, "player_id is invalid"
-        here = self[point.to_tuple()]
-        target = {"shipyard": None, "distance": self._size}
-
-        for shipyard in self._shipyards:
-            distance = here.point.distance(shipyard.point)
-            if distance == 0:
-                continue
-
-            if distance < target["distance"]:
-                if player_id is None:
-                    target["shipyard"] = shipyard
-                    target["distance"] = distance
-                elif shipyard.player_id == player_id:
-                    target["shipyard"] = shipyard
-                    target["distance"] = distance
-
-        return target["shipyard"]
+        return self._nearest("shipyard", player_id)[0][point.index]
     
     def closest_distance(self, point: Point, player_id: Optional[int]) -> Optional[int]:
         assert player_id is None or player_id in {0, 1}, "player_id is invalid"
-        here = self[point.to_tuple()]
-        target = {"shipyard": None, "distance": self._size}
-
-        for shipyard in self._shipyards:
-            distance = here.point.distance(shipyard.point)
-            if distance == 0:
-                continue
-
-            if distance < target["distance"]:
-                if player_id is None:
-                    target["shipyard"] = shipyard
-                    target["distance"] = distance
-                elif shipyard.player_id == player_id:
-                    target["shipyard"] = shipyard
-                    target["distance"] = distance
-
-        return target["distance"]
+        return self._nearest("shipyard", player_id)[1][point.index]
     
     def closest_fleet(self, point: Point, player_id: Optional[int]) -> Optional[Fleet]:
         assert player_id is None or player_id in {0, 1}, "player_id is invalid"
-        here = self[point.to_tuple()]
-        target = {"fleet": None, "distance": self._size}
-
-        for fleet in self._fleets:
-            distance = here.point.distance(fleet.point)
-            if distance == 0:
-                continue
-            
-            if distance < target["distance"]:
-                if player_id is None:
-                    target["fleet"] = fleet
-                    target["distance"] = distance
-                elif fleet.player_id == player_id:
-                    target["fleet"] = fleet
-                    target["distance"] = distance
-
-        return target["fleet"]
+        return self._nearest("fleet", player_id)[0][point.index]
     
     def surrounding_kore(self, point: Point, player_id: int, max_distance=5) -> Tuple[float, int]:
         total = 0
@@ -185,6 +237,9 @@ class Field:
                 num_ships += cell.shipyard.ship_count
         return total, num_ships
 
+# routes kept by Route.build
+ROUTE_CACHE_SIZE = 1 << 14
+
 class Route:
     def __init__(self, route_cell: List[Point], is_convert: bool):
         self._route_cell = route_cell
@@ -200,6 +255,11 @@ class Route:
     def route_cell(self) -> List[Point]:
         return self._route_cell
 
+    @cached_property
+    def indices(self) -> np.ndarray:
+        """flat indices (Point.index) of route_cell"""
+        return np.array([point.index for point in self._route_cell], dtype=np.int64)
+
     @property
     def end(self) -> Tuple[int, int]:
         return self._route_cell[-1]
@@ -214,67 +274,37 @@ class Route:
 
     @classmethod
     def from_str(cls, point: Point, field: Field, flight_plan: str, direction: Optional[str]) -> "Route":
+        return cls.from_plan(point, field, CompiledPlan.compile(flight_plan), direction)
 
-        def find_first_non_digit(flight_plan: str):
-            for i in range(len(flight_plan)):
-                if not flight_plan[i].isdigit():
-                    return i
-            return len(flight_plan) + 1
-
-        _flight_plan = flight_plan[:]
-        size = field.size
-        is_convert = False
-
-        dx, dy = 0, 0
-        if direction is not None:
-            if not _flight_plan or (_flight_plan and _flight_plan[0].isdigit()):
-                dx, dy = Direction.next_position(direction)
-
-        route_cell = [point]
-        empty_counter = 0
-        count = 0
-        while True:
-            x, y = route_cell[-1].x, route_cell[-1].y
-
-            # continue to move
-            if not _flight_plan:
-                next_point = Point(x + dx, y + dy, size)
-                empty_counter += 1
+    @classmethod
+    def from_plan(cls, point: Point, field: Field, plan: CompiledPlan, direction: Optional[str]) -> "Route":
+        """shared with the other routes of the same plan and shipyard layout (do not modify)"""
+        return Route.build(point._size, point.index, plan, direction, field.shipyard_layout())
 
-            if _flight_plan and _flight_plan[0] == "0":
-                _flight_plan = _flight_plan[1:]
-                continue
-            elif _flight_plan and _flight_plan[0] == "C":
-                is_convert = True
-                break
+    @staticmethod
+    @lru_cache(maxsize=ROUTE_CACHE_SIZE)
+    def build(size: int, index: int, plan: CompiledPlan, direction: Optional[str], shipyards: FrozenSet[int]) -> "Route":
+        """
+        route from the point of the flat index that stops at the first of the shipyards (flat indices), LRU cached across turns
+        keyed by the board size too, Point compares by (x, y) only
+        """
+        points = Point.table(size)
+        point = points[index]
+        codes, is_convert = plan.route_directions(direction, size)
+        x = (point.x + np.cumsum(DX[codes])) % size
+        y = (point.y + np.cumsum(DY[codes])) % size
 
-            # change direction
-            if _flight_plan and _flight_plan[0].isalpha():
-                direction = _flight_plan[0]
-                dx, dy = Direction.next_position(direction)
-                next_point = Point(x + dx, y + dy, size)
-                _flight_plan = _flight_plan[1:]
-            
-            # continue to move
-            elif _flight_plan and _flight_plan[0].isdigit():
-                idx = find_first_non_digit(_flight_plan)
-                digits = int(_flight_plan[:idx]) - 1
-                next_point = Point(x + dx, y + dy, size)
-                _flight_plan = str(digits) + _flight_plan[idx:]
-            
-            route_cell.append(next_point)
+        # stop at the first shipyard
+        occupied = np.zeros(size * size, dtype=bool)
+        occupied[list(shipyards)] = True
+        indices = x * size + y
+        stop = np.flatnonzero(occupied[indices])
+        if len(stop) > 0:
+            indices = indices[:stop[0] + 1]
+            is_convert = False
 
-            if not _flight_plan:
-                empty_counter += 1
-            if empty_counter >= size:
-                break
-            if len(route_cell) > 1 and field[next_point.to_tuple()].shipyard is not None:
-                break
-            
-            if count == 100:
-                raise RuntimeError("loop")
-            count += 1
-        return cls(route_cell, is_convert)
+        route_cell = [point] + [points[index] for index in indices.tolist()]
+        return Route(route_cell, is_convert)
     
     def __repr__(self):
         return f"Route(len={len(self)}, {[(point.x, point.y) for point in self.route_cell]})"
\ No newline at end of file
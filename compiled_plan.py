@@ -0,0 +1,159 @@
+# 飛行計画のコンパイル済み表現
+
+from functools import lru_cache
+import math
+import numpy as np
+from typing import List, Optional, Tuple
+
+# N, E, S, W and 4: stay
+DX = np.array([0, 1, 0, -1, 0], dtype=np.int64)
+DY = np.array([-1, 0, 1, 0, 0], dtype=np.int64)
+STAY = 4
+DIRECTIONS = "NESW"
+# runs of a route are at most RUN_LIMIT * size moves, see route_directions
+RUN_LIMIT = 5
+# plans kept by CompiledPlan.compile
+COMPILE_CACHE_SIZE = 1 << 14
+
+class CompiledPlan:
+    """
+    flight plan parsed once into (direction, run length, convert) instructions
+
+    ex) "N3EC" -> [(N, 4, False), (E, 1, False), (-1, 0, True)]
+    direction -1 keeps the current direction, convert means "C" is checked before the first move.
+    A fleet keeps a cursor (index, turn): the instruction and the turns already spent on it.
+    """
+    __slots__ = ("_directions", "_lengths", "_converts", "_ends_with_run", "_routes")
+
+    def __init__(self, directions: List[int], lengths: List[int], converts: List[bool], ends_with_run: bool):
+        self._directions = tuple(directions)
+        self._lengths = tuple(lengths)
+        self._converts = tuple(converts)
+        self._ends_with_run = ends_with_run
+        self._routes = {}
+
+    @staticmethod
+    @lru_cache(maxsize=COMPILE_CACHE_SIZE)
+    def compile(flight_plan: str) -> "CompiledPlan":
+        assert len([c for c in flight_plan if c not in "NESWC0123456789"]) == 0, f"{flight_plan} is invalid"
+        directions, lengths, converts = [], [], []
+        convert = False
+        after_convert = False
+        ends_with_run = True
+
+        i = 0
+        while i < len(flight_plan):
+            c = flight_plan[i]
+            if c == "C":
+                convert = True
+                after_convert = True
+                i += 1
+                continue
+
+            if c in DIRECTIONS:
+                direction = DIRECTIONS.index(c)
+                i += 1
+                j = i
+                while j < len(flight_plan) and flight_plan[j].isdigit():
+                    j += 1
+                run = int(flight_plan[i:j]) if j > i else 0
+                ends_with_run = j > i
+                directions.append(direction)
+                lengths.append(1 + run)
+            else:
+                j = i
+                while j < len(flight_plan) and flight_plan[j].isdigit():
+                    j += 1
+                run = int(flight_plan[i:j])
+                ends_with_run = True
+                # a run right after "C" is consumed even if it is zero
+                if after_convert:
+                    run = max(run, 1)
+                elif run == 0:
+                    i = j
+                    continue
+                directions.append(-1)
+                lengths.append(run)
+
+            converts.append(convert)
+            convert = False
+            after_convert = False
+            i = j
+
+        if convert:
+            directions.append(-1)
+            lengths.append(0)
+            converts.append(True)
+        return CompiledPlan(directions, lengths, converts, ends_with_run)
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def convert_at(self, index: int, turn: int) -> bool:
+        """'C' is checked at this turn"""
+        return turn == 0 and index < len(self._lengths) and self._converts[index]
+
+    def advance(self, index: int, turn: int) -> Tuple[int, int, int]:
+        """one turn -> (new direction or -1, index, turn)"""
+        if index < len(self._lengths) and self._lengths[index] == 0:
+            index += 1
+        if index >= len(self._lengths):
+            return -1, index, 0
+
+        direction = self._directions[index] if turn == 0 else -1
+        turn += 1
+        if turn >= self._lengths[index]:
+            index, turn = index + 1, 0
+        return direction, index, turn
+
+    def to_str(self, index: int = 0, turn: int = 0) -> str:
+        """remaining flight plan"""
+        result = ""
+        for i in range(index, len(self._lengths)):
+            if self._converts[i] and not (i == index and turn > 0):
+                result += "C"
+            if i == index and turn > 0:
+                result += str(self._lengths[i] - turn)
+            elif self._directions[i] >= 0:
+                result += DIRECTIONS[self._directions[i]]
+                if self._lengths[i] > 1:
+                    result += str(self._lengths[i] - 1)
+            elif self._lengths[i] > 0:
+                result += str(self._lengths[i])
+        if self._ends_with_run and result and result[-1] in DIRECTIONS:
+            result += "0"
+        return result
+
+    def route_directions(self, direction: Optional[str], size: int) -> Tuple[np.ndarray, bool]:
+        """
+        direction of each move along the route (Route.from_str semantics), is_convert
+        runs longer than RUN_LIMIT * size moves are cut by multiples of size (same cells, same end point)
+        """
+        key = (direction, size)
+        if key not in self._routes:
+            current = STAY if direction is None else DIRECTIONS.index(direction)
+            directions, lengths = [], []
+            is_convert = False
+            for d, length, convert in zip(self._directions, self._lengths, self._converts):
+                if convert:
+                    is_convert = True
+                    break
+                if d >= 0:
+                    current = d
+                directions.append(current)
+                # a straight run repeats every size moves, longer runs keep their cells and end point
+                if length > RUN_LIMIT * size:
+                    length = (RUN_LIMIT - 1) * size + (length - RUN_LIMIT * size) % size
+                lengths.append(length)
+
+            if not is_convert:
+                # the route continues after the plan is consumed
+                directions.append(current)
+                if self._ends_with_run or not self._lengths:
+                    lengths.append(math.ceil(size / 2))
+                else:
+                    lengths.append(math.ceil((size - 1) / 2))
+
+            codes = np.repeat(np.array(directions, dtype=np.int64), lengths)
+            self._routes[key] = (codes, is_convert)
+        return self._routes[key]
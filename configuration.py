@@ -39,4 +39,9 @@ class Configuration(Dict[str, any]):
     @property
     def random_seed(self) -> int:
         """The seed to the random number generator (0 means no seed)."""
-        return self["randomSeed"]
\ No newline at end of file
+        return self["randomSeed"]
+
+    @property
+    def act_timeout(self) -> float:
+        """Maximum runtime (seconds) of a turn before the overage time is used. default=3"""
+        return self.get("actTimeout", 3)
@@ -1,13 +1,14 @@
-from typing import Optional, Union
+import numpy as np
+from typing import Dict, List, Optional, Tuple, Union
 from board import Board
 from cell import Field, Route
+from compiled_plan import CompiledPlan
 from board_decorator import Info
 from point import Direction, Point
 from helpers import (
     collection_rate_for_ship_count, 
     min_ship_count_for_flight_plan_len, 
     max_flight_plan_len_for_ship_count, 
-    max_ships_to_spawn, 
     cached_property
 )
 
@@ -26,6 +27,7 @@ class FlightPlan:
         self._is_longitude = is_longitude
         self._plan_type = plan_type
         self._direction = None
+        self._template: Optional[PlanTemplate] = kwargs.get("template")
 
         if plan_type == "CONVERT":
             self._convert_const = kwargs["convert_cost"]
@@ -46,36 +48,33 @@ class FlightPlan:
     
     @cached_property
     def min_ship_count(self) -> int:
-        min_ships = min_ship_count_for_flight_plan_len(len(self._command))
+        if self._template is not None:
+            min_ships = self._template.min_ship_count
+        else:
+            min_ships = min_ship_count_for_flight_plan_len(len(self._command))
         if self._plan_type == "CONVERT":
             return max(min_ships, self._convert_const)
         else:
             return min_ships
     
+    @staticmethod
+    def from_template(template: "PlanTemplate", start: Point, field: Field, is_longitude=True, **kwargs) -> "FlightPlan":
+        return FlightPlan(template.command, start, field, template.plan_type, is_longitude, template=template, **kwargs)
+
     @staticmethod
     def shortest_plan(start: Point, end: Point, field: Field, is_longitude=True) -> "FlightPlan":
-        flight_plan = shortest_path_between(start, end, is_longitude)
-        if flight_plan[-1].isdigit():
-            flight_plan = flight_plan[:-1]
-        return FlightPlan(flight_plan, start, field, "ONEWAY", is_longitude)
+        template = PlanLibrary.of(field.size).shortest(end.x - start.x, end.y - start.y, is_longitude)
+        return FlightPlan.from_template(template, start, field, is_longitude)
     
     @staticmethod
     def circle_plan(start: Point, diag: Point, field: Field, is_longitude=True) -> "FlightPlan":
-        flight_plan = shortest_path_between(start, diag, is_longitude=is_longitude)
-        flight_plan += shortest_path_between(diag, start, is_longitude=is_longitude)
-        
-        if flight_plan and flight_plan[-1].isdigit():
-            flight_plan = flight_plan[:-1]
-        return FlightPlan(flight_plan, start, field, "RETURN", is_longitude)
+        template = PlanLibrary.of(field.size).circle(diag.x - start.x, diag.y - start.y, is_longitude)
+        return FlightPlan.from_template(template, start, field, is_longitude)
     
     @staticmethod
     def l_shaped_plan(start: Point, diag: Point, field: Field, is_longitude=True) -> "FlightPlan":
-        flight_plan = shortest_path_between(start, diag, is_longitude=is_longitude)
-        flight_plan += shortest_path_between(diag, start, is_longitude=not is_longitude)
-        
-        if flight_plan and flight_plan[-1].isdigit():
-            flight_plan = flight_plan[:-1]
-        return FlightPlan(flight_plan, start, field, "RETURN", is_longitude)
+        template = PlanLibrary.of(field.size).l_shaped(diag.x - start.x, diag.y - start.y, is_longitude)
+        return FlightPlan.from_template(template, start, field, is_longitude)
 
     @staticmethod
     def s_shaped_plan(
@@ -88,28 +87,21 @@ class FlightPlan:
     ) -> "FlightPlan":
         if is_longitude:
             assert start.x == curve.x
-            curve2 = Point(end.x, curve.y, field.size)
+            turn = curve.y - start.y
         else:
             assert start.y == curve.y
-            curve2 = Point(curve.x, end.y, field.size)
-
-        flight_plan = shortest_path_between(start, curve, is_longitude)
-        flight_plan += shortest_path_between(curve, curve2, not is_longitude)
-        flight_plan += shortest_path_between(curve2, end, is_longitude)
+            turn = curve.x - start.x
 
+        template = PlanLibrary.of(field.size).s_shaped(end.x - start.x, end.y - start.y, turn, is_longitude, is_convert)
         if is_convert:
-            flight_plan += "C"
-            return FlightPlan(flight_plan, start, field, "CONVERT", is_longitude, convert_cost=50)
+            return FlightPlan.from_template(template, start, field, is_longitude, convert_cost=50)
         else:
-            if flight_plan and flight_plan[-1].isdigit():
-                flight_plan = flight_plan[:-1]
-            return FlightPlan(flight_plan, start, field, "ONEWAY", is_longitude)
+            return FlightPlan.from_template(template, start, field, is_longitude)
     
     @staticmethod
     def convert_plan(start: Point, end: Point, field: Field, convert_cost: int, is_longitude=True) -> "FlightPlan":
-        flight_plan = shortest_path_between(start, end, is_longitude=is_longitude)
-        flight_plan += "C"
-        return FlightPlan(flight_plan, start, field, "CONVERT", is_longitude, convert_cost=convert_cost)
+        template = PlanLibrary.of(field.size).convert(end.x - start.x, end.y - start.y, is_longitude)
+        return FlightPlan.from_template(template, start, field, is_longitude, convert_cost=convert_cost)
     
     @staticmethod
     def existing_fleet_plan(start: Point, flight_plan: str, direction: str, field: Field) -> "FlightPlan":
@@ -117,6 +109,8 @@ class FlightPlan:
     
     @cached_property
     def flight_plan_route(self) -> Route:
+        if self._template is not None:
+            return Route.from_plan(self._start_cell, self._field, self._template.compiled, self._direction)
         return Route.from_str(self._start_cell, self._field, self._command, self._direction)
     
     @staticmethod
@@ -142,6 +136,7 @@ class FlightPlan:
         else:
             best_score = {"kore": 10**9, "plan": None}
 
+        plans = []
         for is_longitude in {False, True}:
             for i in range(size):
                 if not is_longitude:
@@ -155,15 +150,16 @@ class FlightPlan:
                 plan = FlightPlan.s_shaped_plan(start, end, point, board.field, is_longitude, is_convert)
                 if ship_count < plan.min_ship_count:
                     continue
+                plans.append(plan)
 
-                kore = plan.expected_total_assets(ship_count, board, info, is_my_shipyard=True)
-
-                if is_max_kore and kore > best_score["kore"]:
-                    best_score["plan"] = plan
-                    best_score["kore"] = kore
-                elif not is_max_kore and 0 < kore < best_score["kore"]:
-                    best_score["plan"] = plan
-                    best_score["kore"] = kore
+        kores = FlightPlan.expected_total_assets_batch(plans, [ship_count] * len(plans), board, info, is_my_shipyard=True)
+        for plan, kore in zip(plans, kores.tolist()):
+            if is_max_kore and kore > best_score["kore"]:
+                best_score["plan"] = plan
+                best_score["kore"] = kore
+            elif not is_max_kore and 0 < kore < best_score["kore"]:
+                best_score["plan"] = plan
+                best_score["kore"] = kore
         
         if best_score["plan"] is None:
             if is_convert:
@@ -172,20 +168,42 @@ class FlightPlan:
                 return FlightPlan.shortest_plan(start, end, board.field)
         return best_score["plan"]
     
+    @property
+    def key(self) -> tuple:
+        """what the route depends on: start, command, direction and the shipyard layout"""
+        return (self._start_cell, self._command, self._direction, self._field.shipyard_layout())
+
     def expected_total_assets(
         self, 
         ship_count: int, 
         board: Board, 
         info: Info, 
         is_my_shipyard: bool = False
+    ) -> Union[int, float]:
+        """memoized in info.plan_scores"""
+        key = ("assets", self.key, ship_count, is_my_shipyard, info.total_turn)
+        score = info.plan_scores.get(key)
+        if score is None:
+            score = self._expected_total_assets(ship_count, board, info, is_my_shipyard)
+            info.plan_scores.put(key, score)
+        return score
+
+    def _expected_total_assets(
+        self, 
+        ship_count: int, 
+        board: Board, 
+        info: Info, 
+        is_my_shipyard: bool = False
     ) -> Union[int, float]:
         assert ship_count >= 1, f"ship_count: {ship_count} must be positive"
         me = board.current_player
         spawn_cost = board.configuration.spawn_cost
 
         if self.flight_plan_route:
-            score = {"kore": 0, "damage": 0, "destroyed": set(), "opp_kore": 0}
+            score = {"kore": 0}
             delta_kore = round(collection_rate_for_ship_count(ship_count), 3)
+            route_damage = self._route_damage(info, range(len(self.flight_plan_route))).sum(axis=1).tolist()
+            route_attacked = info.territory(board).attacked(self._start_cell, self.flight_plan_route.route_cell, ship_count).tolist()
 
             route_kore = {}
             total_turn = 0
@@ -211,27 +229,12 @@ class FlightPlan:
                     else:
                         return -10**9
 
-                is_attacked = check_fleet_attacked(point, self._start_cell, ship_count, board, info)
-                if is_attacked:
+                if route_attacked[i]:
                     return -10**9
                 
-                if future_field is not None and i != self.flight_plan_route.time:
-                    cell = future_field[point.to_tuple()]
-                    
-                    if cell.fleet is not None:
-                        if cell.fleet.player_id == me.player_id:
-                            return -10**9
-                        
-                        elif cell.fleet.player_id != me.player_id and cell.fleet.id not in score["destroyed"]:
-                            score["damage"] += cell.fleet.ship_count
-                            score["destroyed"].add(cell.fleet.id)
-                            score["opp_kore"] += cell.fleet.expected_kore
-                    
-                    for fleet in cell.adjacent_fleets:
-                        if fleet.id != me.player_id and fleet.id not in score["destroyed"]:
-                            score["damage"] += fleet.ship_count
-                            score["destroyed"].add(fleet.id)
-                            score["opp_kore"] += fleet.expected_kore
+                # any fleet on or next to the route (allied fleets next to it included)
+                if route_damage[i] > 0:
+                    return -10**9
 
                 if (point.x, point.y) in route_kore:
                     previous, gain = route_kore[(point.x, point.y)]
@@ -252,17 +255,166 @@ class FlightPlan:
                 
                 route_kore[(point.x, point.y)] = (i, gain)
             
-            if score["damage"] >= 1:
-                return -10**9
-
-            total_assets = score["kore"] + score["opp_kore"]
-            return total_assets / (total_turn + 1)
+            return score["kore"] / (total_turn + 1)
         else:
             return -10**9
 
+    @staticmethod
+    def expected_total_assets_batch(
+        plans: List["FlightPlan"],
+        ship_counts: List[int],
+        board: Board,
+        info: Info,
+        is_my_shipyard: bool = False
+    ) -> np.ndarray:
+        """expected_total_assets of each plan, the plans not in info.plan_scores are scored together"""
+        keys = [
+            ("assets", plan.key, ship_count, is_my_shipyard, info.total_turn)
+            for plan, ship_count in zip(plans, ship_counts)
+        ]
+        scores = [info.plan_scores.get(key) for key in keys]
+        missing = [i for i, score in enumerate(scores) if score is None]
+        if missing:
+            computed = FlightPlan._expected_total_assets_batch(
+                [plans[i] for i in missing], [ship_counts[i] for i in missing], board, info, is_my_shipyard
+            ).tolist()
+            for i, score in zip(missing, computed):
+                scores[i] = score
+                info.plan_scores.put(keys[i], score)
+        return np.array(scores, dtype=np.float64)
+
+    @staticmethod
+    def _expected_total_assets_batch(
+        plans: List["FlightPlan"],
+        ship_counts: List[int],
+        board: Board,
+        info: Info,
+        is_my_shipyard: bool = False
+    ) -> np.ndarray:
+        """routes are scored together as a padded (plans, route length) array"""
+        assert all(ship_count >= 1 for ship_count in ship_counts), f"ship_counts: {ship_counts} must be positive"
+        if not plans:
+            return np.zeros(0, dtype=np.float64)
+        me = board.current_player
+        size = board.configuration.size
+        tensors = info.tensors()
+        index, lengths = FlightPlan._route_index(plans)
+        length = index.shape[1]
+        start = index[:, :1]
+        ship_count = np.array(ship_counts, dtype=np.int64)[:, None]
+        delta_kore = np.array([round(collection_rate_for_ship_count(count), 3) for count in ship_counts])[:, None]
+
+        # turns after total_turn read total_turn, the start and the last point are not scored
+        position = np.arange(length)
+        turn = np.minimum(position, info.total_turn)
+        scored = (position >= 1) & (position < lengths[:, None] - 1)
+        owner = tensors.shipyard_owner.reshape(len(tensors.shipyard_owner), -1)[turn, index]
+        kore = tensors.kore.reshape(len(tensors.kore), -1)[turn, index]
+        damage = (tensors.direct_damage + tensors.adjacent_damage).sum(axis=1)
+        damage = damage.reshape(len(damage), -1)[turn, index]
+        attacked = info.territory(board).attacked_index(start, index, ship_count)
+
+        # the first allied shipyard on the route ends the scoring (rejected when launched from a shipyard)
+        # an opponent shipyard, an attack or any fleet on or next to the route rejects the plan
+        allied = owner == me.player_id
+        if is_my_shipyard:
+            rejected = owner != -1
+        else:
+            rejected = (owner != -1) & ~allied
+        rejected |= (owner == -1) & (attacked | (damage > 0))
+        event = scored & (rejected | allied)
+        has_event = event.any(axis=1)
+        first = np.where(has_event, event.argmax(axis=1), length)
+        rejected = has_event & rejected[np.arange(len(plans)), np.minimum(first, length - 1)]
+        counted = scored & (position < first[:, None])
+        total_turn = (scored & (position <= first[:, None])).sum(axis=1)
+
+        # kore mined on the last visit of the same cell grows by 2% a turn and is not mined again
+        visit = (index[:, :, None] == index[:, None, :]) & counted[:, None, :] & (position[None, :, None] > position[None, None, :])
+        revisit = visit.any(axis=2)
+        previous = length - 1 - visit[:, :, ::-1].argmax(axis=2)
+        gain = kore / 1.02 * delta_kore
+        rows, columns = np.nonzero(counted & revisit)
+        for _ in range(int(visit.sum(axis=2).max())):
+            mined_kore = gain[rows, previous[rows, columns]] * 1.02 ** (columns - previous[rows, columns])
+            gain[rows, columns] = (kore[rows, columns] / 1.02 - mined_kore) * delta_kore[rows, 0]
+
+        distance = Point.distance_matrix(size)[start, index]
+        alpha = np.where(counted, gain * 1.02 ** distance, 0.0)
+        # summed in route order like expected_total_assets
+        score = np.cumsum(alpha, axis=1)[:, -1] / (total_turn + 1)
+        return np.where(rejected, -10**9, score)
+
+    @staticmethod
+    def expected_total_assets_bound(plans: List["FlightPlan"], ship_counts: List[int], info: Info) -> np.ndarray:
+        """
+        upper bound of expected_total_assets_batch: the largest kore of each route cell over the turns,
+        as if no fleet or shipyard rejected the plan and the scoring stopped where the average is the highest
+        inf for routes that visit a cell three times or more (the revisit gain is not bounded by the kore there)
+        """
+        if not plans:
+            return np.zeros(0, dtype=np.float64)
+        size = info.config.size
+        tensors = info.tensors()
+        index, lengths = FlightPlan._route_index(plans)
+        length = index.shape[1]
+        delta_kore = np.array([round(collection_rate_for_ship_count(count), 3) for count in ship_counts])[:, None]
+
+        position = np.arange(length)
+        scored = (position >= 1) & (position < lengths[:, None] - 1)
+        kore = tensors.kore.reshape(len(tensors.kore), -1).max(axis=0)[index]
+        distance = Point.distance_matrix(size)[index[:, :1], index]
+        # the same operations as expected_total_assets_batch on larger kore
+        alpha = np.where(scored, kore / 1.02 * delta_kore * 1.02 ** distance, 0.0)
+        total = np.cumsum(alpha, axis=1)
+
+        # stopped at position e (an allied shipyard): positions 1..e - 1 over e + 1
+        stopped = np.where(scored[:, 1:], total[:, :-1] / (position[1:] + 1), 0.0).max(axis=1, initial=0.0)
+        completed = total[:, -1] / (np.maximum(lengths - 2, 0) + 1)
+        bound = np.maximum(stopped, completed)
+
+        visits = ((index[:, :, None] == index[:, None, :]) & scored[:, None, :] & scored[:, :, None]).sum(axis=2)
+        return np.where(visits.max(axis=1) >= 3, np.inf, bound)
+
+    @staticmethod
+    def _route_index(plans: List["FlightPlan"]) -> Tuple[np.ndarray, np.ndarray]:
+        """(plans, longest route) flat indices of the routes padded with 0, and the route lengths"""
+        routes = [plan.flight_plan_route for plan in plans]
+        lengths = np.array([len(route) for route in routes], dtype=np.int64)
+        index = np.zeros((len(plans), int(lengths.max())), dtype=np.int64)
+        for k, route in enumerate(routes):
+            index[k, :len(route)] = route.indices
+        return index, lengths
+
+    def _route_damage(self, info: Info, turns) -> np.ndarray:
+        """(len(turns), players) ships hitting the route point of each turn, turns after total_turn read total_turn"""
+        tensors = info.tensors()
+        points = [self.flight_plan_route.route_cell[i] for i in turns]
+        turns = np.minimum(np.array(turns, dtype=np.int64), info.total_turn)
+        x = np.array([point.x for point in points], dtype=np.int64)
+        y = np.array([point.y for point in points], dtype=np.int64)
+        return tensors.direct_damage[turns, :, x, y] + tensors.adjacent_damage[turns, :, x, y]
+
     def future_damage(self, player_id: int, info: Info) -> int:
+        """memoized in info.plan_scores"""
+        key = ("damage", self.key, player_id, info.total_turn)
+        result = info.plan_scores.get(key)
+        if result is None:
+            result = self._future_damage(player_id, info)
+            info.plan_scores.put(key, result)
+        damage, attack = result
+        return damage, set(attack)
+
+    def _future_damage(self, player_id: int, info: Info) -> int:
         damage = 0
         attack = set()
+        # no opponent fleet on or next to the route
+        turns = range(1, min(len(self.flight_plan_route), info.total_turn + 1))
+        route_damage = self._route_damage(info, turns)
+        route_damage[:, player_id] = 0
+        if not route_damage.any():
+            return damage, attack
+
         for i, point in enumerate(self.flight_plan_route):
             if i == 0 and i == len(self.flight_plan_route) - 1:
                 continue
@@ -316,41 +468,144 @@ def shortest_path_between(start: Point, end: Point, is_longitude=True) -> str:
         return flight_path_x + flight_path_y
 
 def check_fleet_attacked(point: Point, start: Point, num_ships: int, board: Board, info: Info) -> bool:
-    me = board.current_player
-    opp = board.opponent_player
-
-    closest_me = board.field.closest_shipyard(point, me.player_id)
-    closest_opp = board.field.closest_shipyard(point, opp.player_id)
-    if closest_me is None or closest_opp is None:
-        return False
-
-    if (closest_me.point == start
-        and closest_me.point.distance(point) < closest_opp.point.distance(point)
-    ):
-        return False
-    
-    elif (not closest_me.point == start
-        and closest_me.point.distance(point) < closest_opp.point.distance(point) - 1
-    ):
-        return False
-
-    me_distance = start.distance(point)
-    opp_distance = closest_opp.point.distance(point)
-
-    turn = me_distance - opp_distance + 1
-    field = info.future_field(turn=turn)
-    if field is None and turn == 0:
-        field = board.field
-    elif field is None and turn < 0:
-        return False
-    elif field is None:
-        field = info.future_field(turn=info.total_turn)
-    
-    spawn_power = 0
-    for i in range(turn):
-        spawn_power += max_ships_to_spawn(closest_opp.turns_controlled + i)
+    return bool(info.territory(board).attacked(start, [point], num_ships)[0])
 
-    if num_ships > field[closest_opp.point.to_tuple()].shipyard.ship_count + spawn_power:
-        return False
-    else:
-        return True
\ No newline at end of file
+class PlanTemplate:
+    """
+    plan relative to its start, the same wherever end - start (not wrapped) and the orientation are the same
+    """
+    __slots__ = ("_command", "_plan_type", "_compiled", "_min_ship_count")
+
+    def __init__(self, command: str, plan_type: str):
+        self._command = command
+        self._plan_type = plan_type
+        self._compiled = CompiledPlan.compile(command)
+        self._min_ship_count = min_ship_count_for_flight_plan_len(len(command))
+
+    @property
+    def command(self) -> str:
+        return self._command
+
+    @property
+    def plan_type(self) -> str:
+        return self._plan_type
+
+    @property
+    def compiled(self) -> CompiledPlan:
+        return self._compiled
+
+    @property
+    def min_ship_count(self) -> int:
+        """min_ship_count_for_flight_plan_len of the command (convert cost not included)"""
+        return self._min_ship_count
+
+    def __repr__(self):
+        return f"PlanTemplate({self._command}, plan_type='{self._plan_type}')"
+
+class PlanLibrary:
+    """
+    templates of the FlightPlan shapes for a board size, each built on first use
+    offsets are end - start without wrapping (-size < dx, dy < size) since shortest_path_between depends on them
+    """
+    _libraries: Dict[int, "PlanLibrary"] = {}
+
+    def __init__(self, size: int):
+        self._size = size
+        self._templates: Dict[tuple, PlanTemplate] = {}
+
+    @classmethod
+    def of(cls, size: int) -> "PlanLibrary":
+        try:
+            return cls._libraries[size]
+        except KeyError:
+            pass
+        library = cls._libraries[size] = PlanLibrary(size)
+        return library
+
+    def __len__(self) -> int:
+        return len(self._templates)
+
+    def _points(self, *offsets: Tuple[int, int]) -> List[Point]:
+        """points at the offsets from a start chosen so that none of them wraps"""
+        x = max(0, *(-dx for dx, _ in offsets))
+        y = max(0, *(-dy for _, dy in offsets))
+        return [Point(x + dx, y + dy, self._size) for dx, dy in offsets]
+
+    def shortest(self, dx: int, dy: int, is_longitude=True) -> PlanTemplate:
+        key = ("shortest", dx, dy, is_longitude)
+        try:
+            return self._templates[key]
+        except KeyError:
+            pass
+        start, end = self._points((0, 0), (dx, dy))
+        flight_plan = shortest_path_between(start, end, is_longitude)
+        if flight_plan[-1].isdigit():
+            flight_plan = flight_plan[:-1]
+        template = self._templates[key] = PlanTemplate(flight_plan, "ONEWAY")
+        return template
+
+    def circle(self, dx: int, dy: int, is_longitude=True) -> PlanTemplate:
+        key = ("circle", dx, dy, is_longitude)
+        try:
+            return self._templates[key]
+        except KeyError:
+            pass
+        start, diag = self._points((0, 0), (dx, dy))
+        flight_plan = shortest_path_between(start, diag, is_longitude=is_longitude)
+        flight_plan += shortest_path_between(diag, start, is_longitude=is_longitude)
+        
+        if flight_plan and flight_plan[-1].isdigit():
+            flight_plan = flight_plan[:-1]
+        template = self._templates[key] = PlanTemplate(flight_plan, "RETURN")
+        return template
+
+    def l_shaped(self, dx: int, dy: int, is_longitude=True) -> PlanTemplate:
+        key = ("l_shaped", dx, dy, is_longitude)
+        try:
+            return self._templates[key]
+        except KeyError:
+            pass
+        start, diag = self._points((0, 0), (dx, dy))
+        flight_plan = shortest_path_between(start, diag, is_longitude=is_longitude)
+        flight_plan += shortest_path_between(diag, start, is_longitude=not is_longitude)
+        
+        if flight_plan and flight_plan[-1].isdigit():
+            flight_plan = flight_plan[:-1]
+        template = self._templates[key] = PlanTemplate(flight_plan, "RETURN")
+        return template
+
+    def s_shaped(self, dx: int, dy: int, turn: int, is_longitude=True, is_convert=False) -> PlanTemplate:
+        """turn: offset of the first curve along the first leg (y if is_longitude else x)"""
+        key = ("s_shaped", dx, dy, turn, is_longitude, is_convert)
+        try:
+            return self._templates[key]
+        except KeyError:
+            pass
+        if is_longitude:
+            start, curve, curve2, end = self._points((0, 0), (0, turn), (dx, turn), (dx, dy))
+        else:
+            start, curve, curve2, end = self._points((0, 0), (turn, 0), (turn, dy), (dx, dy))
+
+        flight_plan = shortest_path_between(start, curve, is_longitude)
+        flight_plan += shortest_path_between(curve, curve2, not is_longitude)
+        flight_plan += shortest_path_between(curve2, end, is_longitude)
+
+        if is_convert:
+            template = PlanTemplate(flight_plan + "C", "CONVERT")
+        else:
+            if flight_plan and flight_plan[-1].isdigit():
+                flight_plan = flight_plan[:-1]
+            template = PlanTemplate(flight_plan, "ONEWAY")
+        self._templates[key] = template
+        return template
+
+    def convert(self, dx: int, dy: int, is_longitude=True) -> PlanTemplate:
+        key = ("convert", dx, dy, is_longitude)
+        try:
+            return self._templates[key]
+        except KeyError:
+            pass
+        start, end = self._points((0, 0), (dx, dy))
+        flight_plan = shortest_path_between(start, end, is_longitude=is_longitude)
+        template = self._templates[key] = PlanTemplate(flight_plan + "C", "CONVERT")
+        return template
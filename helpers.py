@@ -38,7 +38,7 @@ def create_launch_fleet_command(num_ships: int, plan: str) -> str:
     return f"LAUNCH_{num_ships}_{plan}"
 
 def is_valid_flight_plan(flight_plan: str) -> bool:
-    return len([c for c in flight_plan if c not in "NESW0123456789"]) == 0
+    return len([c for c in flight_plan if c not in "NESWC0123456789"]) == 0
 
 def group_by(items: Iterable, selector: Callable) -> dict:
     results = defaultdict(list)
@@ -0,0 +1,237 @@
+"""
+opt-in instrumentation of rule_agent (phase time, hot primitive calls, cache hit rates, counters)
+
+ex)
+    import instrument
+    recorder = instrument.enable()
+    ...  # play turns
+    instrument.disable()
+    recorder.to_jsonl("turns.jsonl")  # or recorder.to_csv("turns.csv")
+
+Nothing is wrapped until enable(), so the disabled agent runs the original functions.
+A turn starts at board_decorator.lookahead (one per agent call) and ends at the next turn or disable().
+"""
+import csv
+from functools import wraps
+import json
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# name -> () -> (hits, misses) or (hits, misses, evictions); added by modules that own a cache
+CACHES: Dict[str, Callable[[], Tuple[int, ...]]] = {}
+
+# name -> () -> {counter: running total}; reported per turn as count.<name>.<counter>
+COUNTERS: Dict[str, Callable[[], Dict[str, int]]] = {}
+
+def register_cache(name: str, stats: Callable[[], Tuple[int, ...]]) -> None:
+    CACHES[name] = stats
+
+def register_counter(name: str, totals: Callable[[], Dict[str, int]]) -> None:
+    COUNTERS[name] = totals
+
+def lru_stats(function) -> Callable[[], Tuple[int, int]]:
+    """stats of functools.lru_cache"""
+    return lambda: tuple(function.cache_info()[:2])
+
+class Recorder:
+    def __init__(self):
+        self.records: List[Dict[str, float]] = []
+        self._record: Optional[Dict[str, float]] = None
+        self._counts: Dict[str, int] = {}
+        self._cache_start: Dict[str, Tuple[int, ...]] = {}
+        self._counter_start: Dict[str, Dict[str, int]] = {}
+        # Info of the turn, for its per-turn caches
+        self.info = None
+
+    def start_turn(self, step: int, player_id: int) -> None:
+        self.end_turn()
+        self._record = {"step": step, "player": player_id}
+        self._counts = {}
+        self._cache_start = {name: stats() for name, stats in CACHES.items()}
+        self._counter_start = {name: dict(totals()) for name, totals in COUNTERS.items()}
+        self.info = None
+
+    def end_turn(self) -> None:
+        if self._record is None:
+            return
+        record = self._record
+        record["total_ms"] = sum(value for key, value in record.items() if key.endswith("_ms"))
+        for name, count in sorted(self._counts.items()):
+            record[f"calls.{name}"] = count
+        for name, stats in CACHES.items():
+            hits, misses, *evictions = stats()
+            start_hits, start_misses, *start_evictions = self._cache_start.get(name, (0, 0, 0))
+            evictions = [evictions[0] - start_evictions[0]] if evictions else []
+            self._add_cache(record, name, hits - start_hits, misses - start_misses, *evictions)
+        if self.info is not None:
+            self._add_cache(record, "Info.plan_scores", *self.info.plan_scores.stats)
+        for name, totals in COUNTERS.items():
+            start = self._counter_start.get(name, {})
+            for counter, total in totals().items():
+                record[f"count.{name}.{counter}"] = total - start.get(counter, 0)
+        self.records.append(record)
+        self._record = None
+
+    @staticmethod
+    def _add_cache(record: Dict[str, float], name: str, hits: int, misses: int, *evictions: int) -> None:
+        if evictions:
+            record[f"cache.{name}.evictions"] = evictions[0]
+        record[f"cache.{name}.hits"] = hits
+        record[f"cache.{name}.misses"] = misses
+        record[f"cache.{name}.hit_rate"] = hits / (hits + misses) if hits + misses else None
+
+    def add_time(self, phase: str, elapsed: float) -> None:
+        if self._record is not None:
+            key = f"{phase}_ms"
+            self._record[key] = self._record.get(key, 0) + elapsed * 1000
+
+    def count(self, name: str, number: int = 1) -> None:
+        self._counts[name] = self._counts.get(name, 0) + number
+
+    def to_jsonl(self, path: str) -> None:
+        with open(path, "w") as f:
+            for record in self.records:
+                f.write(json.dumps(record) + "\n")
+
+    def to_csv(self, path: str) -> None:
+        fields = []
+        for record in self.records:
+            fields += [key for key in record if key not in fields]
+        with open(path, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            writer.writerows(self.records)
+
+_recorder: Optional[Recorder] = None
+_restore: List[Callable[[], None]] = []
+
+def _primitives():
+    """(owner, attribute, name, items of a call or None for 1)"""
+    import cell
+    import flight_plan
+    import numpy as np
+    import territory
+    return [
+        (cell.Route, "from_str", "Route.from_str", None),
+        (cell.Route, "from_plan", "Route.from_plan", None),
+        # plans scored, one by one or in a batch
+        (flight_plan.FlightPlan, "expected_total_assets", "FlightPlan.expected_total_assets", None),
+        (flight_plan.FlightPlan, "expected_total_assets_batch", "FlightPlan.expected_total_assets",
+            lambda plans, *args, **kwargs: len(plans)),
+        (flight_plan, "check_fleet_attacked", "check_fleet_attacked", None),
+        # points checked (Territory.attacked goes through attacked_index)
+        (territory.Territory, "attacked_index", "Territory.attacked",
+            lambda self, start, index, num_ships: np.broadcast(start, index, num_ships).size),
+        (cell.Field, "closest_shipyard", "Field.closest_shipyard", None),
+        (cell.Field, "surrounding_cells", "Field.surrounding_cells", None),
+    ]
+
+def _caches():
+    import board_decorator
+    from cell import Route
+    from compiled_plan import CompiledPlan
+    import simulator
+    return [
+        ("Info.reuse", lambda: tuple(board_decorator.REUSE_STATS)),
+        ("CompiledPlan.compile", lru_stats(CompiledPlan.compile)),
+        ("Route.build", lru_stats(Route.build)),
+        ("rounded_collection_rate", lru_stats(simulator.rounded_collection_rate)),
+    ]
+
+def _counters():
+    import main
+    return [
+        # candidates pruned by the upper bound and candidates scored
+        ("mine1.bound", lambda: main.MINE1_PRUNE_STATS),
+    ]
+
+def _patch(owner: object, attribute: str, wrap: Callable[[Callable], Callable]) -> None:
+    original = owner.__dict__[attribute] if isinstance(owner, type) else getattr(owner, attribute)
+    if isinstance(original, classmethod):
+        replaced = classmethod(wrap(original.__func__))
+    elif isinstance(original, staticmethod):
+        replaced = staticmethod(wrap(original.__func__))
+    else:
+        replaced = wrap(original)
+    _restore.append(lambda: setattr(owner, attribute, original))
+    setattr(owner, attribute, replaced)
+
+def enable() -> Recorder:
+    global _recorder
+    if _recorder is not None:
+        return _recorder
+    import board_decorator
+    import main
+    recorder = Recorder()
+
+    def counted(name: str, items: Optional[Callable[..., int]]):
+        def wrap(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                recorder.count(name, 1 if items is None else items(*args, **kwargs))
+                return function(*args, **kwargs)
+            return wrapper
+        return wrap
+
+    def timed(name: str):
+        def wrap(function):
+            @wraps(function)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return function(*args, **kwargs)
+                finally:
+                    recorder.add_time(name, time.perf_counter() - start)
+            return wrapper
+        return wrap
+
+    def strategy_timed(function):
+        """the simulation a strategy triggers (Info.simulate) is recorded as simulate, not as the strategy"""
+        name = function.__name__
+        @wraps(function)
+        def wrapper(board, info, *args, **kwargs):
+            start = time.perf_counter()
+            simulation_time = info.simulation_time
+            try:
+                return function(board, info, *args, **kwargs)
+            finally:
+                simulated = info.simulation_time - simulation_time
+                recorder.add_time("simulate", simulated)
+                recorder.add_time(name, time.perf_counter() - start - simulated)
+        return wrapper
+
+    def lookahead(function):
+        timed_function = timed("lookahead")(function)
+        @wraps(function)
+        def wrapper(board, *args, **kwargs):
+            recorder.start_turn(board.step, board.current_player.player_id)
+            info = timed_function(board, *args, **kwargs)
+            recorder.info = info
+            return info
+        return wrapper
+
+    for owner, attribute, name, items in _primitives():
+        _patch(owner, attribute, counted(name, items))
+    _patch(board_decorator, "lookahead", lookahead)
+    strategies = list(main.STRATEGIES)
+    main.STRATEGIES[:] = [strategy_timed(strategy) for strategy in strategies]
+    _restore.append(lambda: main.STRATEGIES.__setitem__(slice(None), strategies))
+    for name, stats in _caches():
+        CACHES.setdefault(name, stats)
+    for name, totals in _counters():
+        COUNTERS.setdefault(name, totals)
+
+    _recorder = recorder
+    return recorder
+
+def disable() -> Optional[Recorder]:
+    global _recorder
+    recorder = _recorder
+    if recorder is None:
+        return None
+    recorder.end_turn()
+    for restore in reversed(_restore):
+        restore()
+    _restore.clear()
+    _recorder = None
+    return recorder
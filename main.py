@@ -1,8 +1,9 @@
 from collections import defaultdict
+import numpy as np
 from typing import Dict, List, Tuple
 from action import Action
 from board import Board
-from board_decorator import Info, future_board
+from board_decorator import Horizon, Info, future_board
 from flight_plan import FlightPlan
 from piece import Shipyard
 from point import Point
@@ -78,19 +79,20 @@ def find_attack_target(board: Board, info: Info) -> dict:
     convert_cost = board.configuration.convert_cost
     target = {"point": None, "power": 0, "turn": 100}
     hostile = defaultdict(list)
+    tensors = info.tensors()
     
     # opponent power and distance
     for opp_sy in opp.shipyards:
         attack_power = distance_power(opp_sy.point, board, info)
+        owners = tensors.shipyard_owner[:, opp_sy.x, opp_sy.y].tolist()
+        ships = tensors.shipyard_ships[:, opp_sy.x, opp_sy.y].tolist()
         
         # guard ships
         need_kore = 0
         spawn_power = 0
         hostile[opp_sy.id].append(0)
         for turn in range(1, info.total_turn + 1):
-            cell_sy = info.future_field(turn=turn)[opp_sy.point.to_tuple()].shipyard
-            
-            if cell_sy.player_id != opp.player_id:
+            if owners[turn] != opp.player_id:
                 hostile[opp_sy.id].append(0)
                 continue
 
@@ -103,24 +105,22 @@ def find_attack_target(board: Board, info: Info) -> dict:
             help_power = 0
             for other_sy in opp.shipyards:
                 distance = opp_sy.point.distance(other_sy.point)
-                if other_sy.id == opp_sy.id or cell_sy.player_id != opp.player_id:
+                if other_sy.id == opp_sy.id:
                     continue
 
                 if 0 < turn - distance <= info.total_turn:
-                    future_sy = info.future_field(turn=turn - distance)[other_sy.point.to_tuple()].shipyard
+                    if tensors.shipyard_owner[turn - distance, other_sy.x, other_sy.y] == opp.player_id:
+                        help_power += int(tensors.shipyard_ships[turn - distance, other_sy.x, other_sy.y])
                 elif turn == distance:
-                    future_sy = other_sy
-                else:
-                    future_sy = None
-
-                if future_sy is not None and future_sy.player_id == opp.player_id:
-                    help_power += future_sy.ship_count
+                    help_power += other_sy.ship_count
 
             # maximum power
-            opponent_power = cell_sy.ship_count + spawn_power + help_power
+            opponent_power = ships[turn] + spawn_power + help_power
             hostile[opp_sy.id].append(opponent_power)
         
         for distance in attack_power:
+            if distance > info.total_turn:
+                continue
             if attack_power[distance] > hostile[opp_sy.id][distance] and distance < target["turn"]:
                 target["power"] = hostile[opp_sy.id][distance]
                 target["point"] = opp_sy.point
@@ -168,6 +168,8 @@ def find_attack_target(board: Board, info: Info) -> dict:
             hostile[fleet.id].append(opponent_power)
 
         for distance in attack_power:
+            if distance > info.total_turn:
+                continue
             if attack_power[distance] > hostile[fleet.id][distance] and distance < target["turn"]:
                 target["power"] = hostile[fleet.id][distance]
                 target["point"] = convert_point
@@ -316,11 +318,10 @@ def spawn_score(start: Point, end: Point, board: Board, info: Info) -> float:
     score = {"num_ships": 0, "kore": 0}
 
     max_distance = 6
+    tensors = info.tensors()
 
-    for i in range(turn, info.total_turn):
-        future_cell = info.future_field(turn=i)[end.to_tuple()]
-        if future_cell.fleet is not None and future_cell.fleet.player_id == opp.player_id:
-            return -10**9
+    if (tensors.fleet_owner[turn:info.total_turn, end.x, end.y] == opp.player_id).any():
+        return -10**9
     
     if board.field[end.to_tuple()].shipyard is not None:
         return -10**9
@@ -341,20 +342,23 @@ def spawn_score(start: Point, end: Point, board: Board, info: Info) -> float:
         future_cell = info.future_field(turn=info.total_turn)[closest.point.to_tuple()]
         score["num_ships"] = future_cell.shipyard.ship_count * (size - closest_opp)
 
-    future_field = info.future_field(turn=turn)
-    for cell in future_field.surrounding_cells(end, 1, max_distance + 1): 
-        if cell.shipyard is not None:
+    future_turn = min(turn, info.total_turn)
+    indices = board.field.ring_indices(end, 1, max_distance + 1)
+    owners = tensors.shipyard_owner[future_turn].ravel()[indices].tolist()
+    kore = tensors.kore[future_turn].ravel()[indices].tolist()
+    points = Point.table(size)
+    for index, owner, cell_kore in zip(indices.tolist(), owners, kore):
+        if owner != -1:
             
-            if cell.point.distance(end) <= 3:
+            if points[index].distance(end) <= 3:
                 return -10**9
             
-            if cell.shipyard.player_id == opp.player_id:
+            if owner == opp.player_id:
                 return -10**9
             else:
                 score["num_ships"] += 1
-        
-        if cell.shipyard is None:
-            score["kore"] += cell.kore
+        else:
+            score["kore"] += cell_kore
 
     distance_me = sum(sy.point.distance(end)**2 for sy in me.shipyards)
     distance_opp = sum(sy.point.distance(end) for sy in opp.shipyards)
@@ -564,6 +568,7 @@ def defence4(board: Board, info: Info) -> None:
 
         attacked_turn = 0
         opp_power = 0
+        future_shipyard = None
         for turn in range(1, info.total_turn):
             future_shipyard = info.future_field(turn=turn)[end.to_tuple()].shipyard
 
@@ -626,6 +631,7 @@ def defence1(board: Board, info: Info) -> None:
     convert_cost = board.configuration.convert_cost
 
     convert_fleet = [fleet for fleet in opp.fleets if fleet.route.is_convert]
+    tensors = info.tensors()
 
     for shipyard in me.shipyards:
 
@@ -640,6 +646,9 @@ def defence1(board: Board, info: Info) -> None:
             distance = shipyard.point.distance(fleet.route.end)
             fleet_power[distance].append(fleet)
 
+        owners = tensors.shipyard_owner[:, shipyard.x, shipyard.y].tolist()
+        ships = tensors.shipyard_ships[:, shipyard.x, shipyard.y].tolist()
+
         attack_sy = []
         for turn in range(30):
             if turn == 0:
@@ -662,10 +671,8 @@ def defence1(board: Board, info: Info) -> None:
                     if turn == fleet.route.time and ship_count >= 0:
                         attack_sy.append({"turns_controlled": 1, "ships": ship_count, "turn": turn})
             
-            if turn <= info.total_turn:
-                cell_sy = info.future_field(turn=turn)[shipyard.point.to_tuple()].shipyard
-            else:
-                cell_sy = info.future_field(turn=info.total_turn)[shipyard.point.to_tuple()].shipyard
+            # the last simulated turn stands in for the turns after it
+            future_turn = min(turn, info.total_turn)
 
             incoming_hostile_power = sum(
                 fleet.ship_count for fleet in shipyard.incoming_hostile_fleets 
@@ -674,12 +681,12 @@ def defence1(board: Board, info: Info) -> None:
 
             attack = sum(opp_dict["ships"] for opp_dict in attack_sy) + incoming_hostile_power
 
-            if cell_sy.player_id == me.player_id:
+            if owners[future_turn] == me.player_id:
                 # overwrite
-                shipyard.capacity.append(cell_sy.ship_count - attack)
+                shipyard.capacity.append(ships[future_turn] - attack)
             else:
                 # overwrite
-                shipyard.capacity.append(-cell_sy.ship_count - attack)
+                shipyard.capacity.append(-ships[future_turn] - attack)
 
 def defence5(board: Board, info: Info) -> None:
     """need help in advance"""
@@ -740,6 +747,7 @@ def mine1(board: Board, info: Info) -> None:
         max_distance = min(board.steps_left // 2, max_distance)
         
         score = {"plan": None, "kore": 0, "ships": 0}
+        candidates = []
 
         min_ships, min_distance = find_best_ship_count(shipyard, board, info)
         if min_distance >= max_distance:
@@ -772,12 +780,15 @@ def mine1(board: Board, info: Info) -> None:
                 if 0 <= available_ship_count - num_ships <= 2:
                     num_ships = available_ship_count
 
-                kore = plan.expected_total_assets(num_ships, board, info)
+                candidates.append((plan, num_ships))
 
-                if kore >= score["kore"]:
-                    score["kore"] = kore
-                    score["plan"] = plan
-                    score["ships"] = num_ships
+        # candidates that cannot reach the best score are not scored (-inf)
+        kores = bounded_scores(candidates, board, info)
+        for (plan, num_ships), kore in zip(candidates, kores):
+            if kore >= score["kore"]:
+                score["kore"] = kore
+                score["plan"] = plan
+                score["ships"] = num_ships
         
         if score["plan"] is None:
             continue
@@ -785,6 +796,35 @@ def mine1(board: Board, info: Info) -> None:
             # overwrite
             shipyard.next_action = Action.launch(num_ships=score["ships"], flight_plan=score["plan"].command)
 
+# candidates of bounded_scores
+MINE1_PRUNE_STATS = {"pruned": 0, "scored": 0}
+MINE1_CHUNK = 32
+
+def bounded_scores(candidates: List[Tuple[FlightPlan, int]], board: Board, info: Info) -> List[float]:
+    """
+    expected_total_assets of the (plan, num_ships) candidates that can score the most (>= 0), -inf for the others
+    scored in chunks by descending upper bound until the bound falls below the best score so far
+    """
+    if not candidates:
+        return []
+    plans = [plan for plan, _ in candidates]
+    ship_counts = [num_ships for _, num_ships in candidates]
+    bounds = FlightPlan.expected_total_assets_bound(plans, ship_counts, info)
+    order = np.argsort(-bounds, kind="stable")
+    kores = np.full(len(candidates), -np.inf)
+    best = 0
+    scored = 0
+    while scored < len(order) and bounds[order[scored]] >= best:
+        chunk = order[scored:scored + MINE1_CHUNK]
+        kores[chunk] = FlightPlan.expected_total_assets_batch(
+            [plans[i] for i in chunk], [ship_counts[i] for i in chunk], board, info
+        )
+        best = max(best, kores[chunk].max())
+        scored += len(chunk)
+    MINE1_PRUNE_STATS["pruned"] += len(order) - scored
+    MINE1_PRUNE_STATS["scored"] += scored
+    return kores.tolist()
+
 def mine2(board: Board, info: Info) -> None:
     """shipyard surrounded by friendly shipyards"""
     me = board.current_player
@@ -794,12 +834,15 @@ def mine2(board: Board, info: Info) -> None:
     
     front = []
     support = []
+    shipyard_owner = info.tensors(turn=0).shipyard_owner[0].ravel()
+    points = Point.table(board.configuration.size)
     for shipyard in me.shipyards:
         closest = {direction: None for direction in ("first", "second", "third", "fourth")}
         
-        for i, cell in enumerate(board.field.surrounding_cells(shipyard.point, 1, 10)):
-            if cell.shipyard is None:
-                continue
+        indices = board.field.ring_indices(shipyard.point, 1, 10)
+        # only cells with a shipyard, i keeps the position in the ring order
+        for i in np.flatnonzero(shipyard_owner[indices] != -1).tolist():
+            cell = board.field[points[indices[i]].to_tuple()]
 
             if (i + 1) % 4 == 1:
                 quadrant = "fourth"
@@ -830,7 +873,7 @@ def mine2(board: Board, info: Info) -> None:
         min_ship_count = 10**9
         for sy in front:
             distance = shipyard.point.distance(sy.point)
-            cell = info.future_field(turn=distance)[sy.point.to_tuple()]
+            cell = info.future_field(turn=min(distance, info.total_turn))[sy.point.to_tuple()]
 
             if cell.shipyard.player_id != me.player_id:
                 continue
@@ -1032,19 +1075,30 @@ def spawn_to_allied_ship_count(shipyard: Shipyard, board: Board, info: Info) ->
             return -1
     return spawn_kore + closest_allied["ships"]
 
-@future_board
+STRATEGIES = [
+    defence1,
+    defence2,
+    defence4,
+    defence5,
+    defence3,
+    attack2,
+    spawn2,
+    mine3,
+    build3,
+    spawn3,
+    mine2,
+    mine1,
+    spawn1,
+]
+
+ENGINE = "array"
+
+def horizon() -> Horizon:
+    """lookahead of rule_agent, deepened when the turn has time to spare and cut when it would not fit in the time budget"""
+    return Horizon(default=20, minimum=8, maximum=30)
+
+@future_board(engine=ENGINE, total_turn=horizon())
 def rule_agent(board, info):
     board.sort_player_shipyards()
-    defence1(board, info)
-    defence2(board, info)
-    defence4(board, info)
-    defence5(board, info)
-    defence3(board, info)
-    attack2(board, info)
-    spawn2(board, info)
-    mine3(board, info)
-    build3(board, info)
-    spawn3(board, info)
-    mine2(board, info)
-    mine1(board, info)
-    spawn1(board, info)
\ No newline at end of file
+    for strategy in STRATEGIES:
+        strategy(board, info)
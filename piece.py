@@ -2,11 +2,17 @@
 
 from typing import List, Optional, Tuple, Union
 from action import Action
+from compiled_plan import CompiledPlan
 from configuration import Configuration
 from point import Direction, Point
 from helpers import max_ships_to_spawn
 
 class Fleet:
+    __slots__ = (
+        "_point", "_fleet_id", "_player_id", "_fleet_kore", "_ship_count", "_direction",
+        "_plan", "_plan_index", "_plan_turn", "_config", "_route", "_expected_kore", "_convert_attack"
+    )
+
     def __init__(self, 
             fleet_id: str, 
             player_id: str, 
@@ -15,7 +21,7 @@ class Fleet:
             fleet_kore: float, 
             ship_count: int, 
             direction: str, 
-            flight_plan: str,
+            flight_plan: Union[str, CompiledPlan],
             config: Configuration
     ):
         self._point = Point(x, y, config.size)
@@ -24,14 +30,16 @@ class Fleet:
         self._fleet_kore = fleet_kore
         self._ship_count = ship_count
         self._direction = direction
-        self._flight_plan = flight_plan
+        self._plan = flight_plan if isinstance(flight_plan, CompiledPlan) else CompiledPlan.compile(flight_plan)
+        self._plan_index = 0
+        self._plan_turn = 0
         self._config = config
         self._route = []
         self._expected_kore = 0
-        self.convert_attack = []
+        # scratch of the agent, created on first access
+        self._convert_attack: Optional[List["Fleet"]] = None
 
         assert direction in ["N", "E", "S", "W"], f"{direction} is invalid direction"
-        assert len([c for c in flight_plan if c not in "NESWC0123456789"]) == 0, f"{flight_plan} is invalid"
 
     @property
     def id(self) -> str:
@@ -67,7 +75,15 @@ class Fleet:
     
     @property
     def flight_plan(self) -> str:
-        return self._flight_plan
+        return self._plan.to_str(self._plan_index, self._plan_turn)
+    
+    @property
+    def plan(self) -> CompiledPlan:
+        return self._plan
+    
+    @property
+    def plan_convert(self) -> bool:
+        return self._plan.convert_at(self._plan_index, self._plan_turn)
     
     @property
     def route(self) -> List[Point]:
@@ -76,6 +92,46 @@ class Fleet:
     @property
     def expected_kore(self) -> float:
         return self._expected_kore + self.kore
+
+    @property
+    def convert_attack(self) -> List["Fleet"]:
+        if self._convert_attack is None:
+            self._convert_attack = []
+        return self._convert_attack
+
+    @convert_attack.setter
+    def convert_attack(self, fleets: List["Fleet"]) -> None:
+        self._convert_attack = fleets
+    
+    def clone(self, *, scratch: bool = True) -> "Fleet":
+        """
+        copy of the mutable state (point, route and config are shared)
+        scratch: copy convert_attack too (snapshots do not need it)
+        """
+        fleet = Fleet.__new__(Fleet)
+        fleet._point = self._point
+        fleet._fleet_id = self._fleet_id
+        fleet._player_id = self._player_id
+        fleet._fleet_kore = self._fleet_kore
+        fleet._ship_count = self._ship_count
+        fleet._direction = self._direction
+        fleet._plan = self._plan
+        fleet._plan_index = self._plan_index
+        fleet._plan_turn = self._plan_turn
+        fleet._config = self._config
+        fleet._route = self._route
+        fleet._expected_kore = self._expected_kore
+        if scratch and self._convert_attack is not None:
+            fleet._convert_attack = list(self._convert_attack)
+        else:
+            fleet._convert_attack = None
+        return fleet
+    
+    def advance_plan(self) -> None:
+        """consume one turn of the flight plan"""
+        direction, self._plan_index, self._plan_turn = self._plan.advance(self._plan_index, self._plan_turn)
+        if direction >= 0:
+            self._direction = Direction(direction).name
     
     def move(self, direction: str) -> None:
         assert direction in {"N", "E", "S", "W"}, f"{direction} is invalid."
@@ -87,7 +143,36 @@ class Fleet:
         return f"Fleet(id={self.id}, player_id={self.player_id}, " \
             f"(x, y)=({self.x}, {self.y}), direction={self.direction})"
 
+class ShipyardScratch:
+    """per-turn state the strategies attach to a shipyard"""
+    __slots__ = (
+        "guard_ship_count", "guard_turn", "expected_guard", "need_ship_count",
+        "capacity", "incoming_allied_fleets", "incoming_hostile_fleets"
+    )
+
+    def __init__(self):
+        self.guard_ship_count = 0
+        self.guard_turn = 100
+        self.expected_guard = 0
+        self.need_ship_count = 0
+        self.capacity: List[int] = []
+        self.incoming_allied_fleets: List[Fleet] = []
+        self.incoming_hostile_fleets: List[Fleet] = []
+
+    def clone(self) -> "ShipyardScratch":
+        scratch = ShipyardScratch.__new__(ShipyardScratch)
+        scratch.guard_ship_count = self.guard_ship_count
+        scratch.guard_turn = self.guard_turn
+        scratch.expected_guard = self.expected_guard
+        scratch.need_ship_count = self.need_ship_count
+        scratch.capacity = list(self.capacity)
+        scratch.incoming_allied_fleets = list(self.incoming_allied_fleets)
+        scratch.incoming_hostile_fleets = list(self.incoming_hostile_fleets)
+        return scratch
+
 class Shipyard:
+    __slots__ = ("_point", "_shipyard_id", "_player_id", "_ship_count", "_turns_controlled", "_next_action", "_config", "_scratch")
+
     def __init__(self, 
             shipyard_id: str, 
             player_id: str, 
@@ -104,13 +189,8 @@ class Shipyard:
         self._turns_controlled = turns_controlled
         self._next_action: Optional[Action] = None
         self._config = config
-        self._guard_ship_count = 0
-        self.guard_turn = 100
-        self.expected_guard = 0
-        self.incoming_allied_fleets = []
-        self.incoming_hostile_fleets = []
-        self.need_ship_count = 0
-        self.capacity = []
+        # created on first access
+        self._scratch: Optional[ShipyardScratch] = None
 
     @property
     def id(self) -> str:
@@ -136,9 +216,15 @@ class Shipyard:
     def ship_count(self) -> int:
         return self._ship_count
     
+    @property
+    def scratch(self) -> ShipyardScratch:
+        if self._scratch is None:
+            self._scratch = ShipyardScratch()
+        return self._scratch
+    
     @property
     def guard_ship_count(self) -> int:
-        return self._guard_ship_count
+        return self._scratch.guard_ship_count if self._scratch is not None else 0
     
     @guard_ship_count.setter
     def guard_ship_count(self, ship_count: int) -> int:
@@ -147,11 +233,55 @@ class Shipyard:
             self.need_ship_count = ship_count - self._ship_count
         elif ship_count < 0:
             ship_count = 0
-        self._guard_ship_count = ship_count
+        self.scratch.guard_ship_count = ship_count
+
+    @property
+    def guard_turn(self) -> int:
+        return self._scratch.guard_turn if self._scratch is not None else 100
+
+    @guard_turn.setter
+    def guard_turn(self, turn: int) -> None:
+        self.scratch.guard_turn = turn
+
+    @property
+    def expected_guard(self) -> int:
+        return self._scratch.expected_guard if self._scratch is not None else 0
+
+    @expected_guard.setter
+    def expected_guard(self, ship_count: int) -> None:
+        self.scratch.expected_guard = ship_count
+
+    @property
+    def need_ship_count(self) -> int:
+        return self._scratch.need_ship_count if self._scratch is not None else 0
+
+    @need_ship_count.setter
+    def need_ship_count(self, ship_count: int) -> None:
+        self.scratch.need_ship_count = ship_count
+
+    @property
+    def capacity(self) -> List[int]:
+        return self.scratch.capacity
+
+    @property
+    def incoming_allied_fleets(self) -> List[Fleet]:
+        return self.scratch.incoming_allied_fleets
+
+    @incoming_allied_fleets.setter
+    def incoming_allied_fleets(self, fleets: List[Fleet]) -> None:
+        self.scratch.incoming_allied_fleets = fleets
+
+    @property
+    def incoming_hostile_fleets(self) -> List[Fleet]:
+        return self.scratch.incoming_hostile_fleets
+
+    @incoming_hostile_fleets.setter
+    def incoming_hostile_fleets(self, fleets: List[Fleet]) -> None:
+        self.scratch.incoming_hostile_fleets = fleets
     
     @property
     def available_ship_count(self) -> int:
-        return max(self._ship_count - self._guard_ship_count - self.expected_guard, 0)
+        return max(self._ship_count - self.guard_ship_count - self.expected_guard, 0)
 
     @property
     def turns_controlled(self) -> int:
@@ -169,6 +299,22 @@ class Shipyard:
     def next_action(self, action: str) -> None:
         self._next_action = action
     
+    def clone(self, *, scratch: bool = True) -> "Shipyard":
+        """
+        copy of the mutable state (point, action and config are shared)
+        scratch: copy the strategies' scratch too (snapshots do not need it)
+        """
+        shipyard = Shipyard.__new__(Shipyard)
+        shipyard._point = self._point
+        shipyard._shipyard_id = self._shipyard_id
+        shipyard._player_id = self._player_id
+        shipyard._ship_count = self._ship_count
+        shipyard._turns_controlled = self._turns_controlled
+        shipyard._next_action = self._next_action
+        shipyard._config = self._config
+        shipyard._scratch = self._scratch.clone() if scratch and self._scratch is not None else None
+        return shipyard
+    
     def spawn_as_many_ships(self, player_kore: Union[int, float]) -> int:
         assert isinstance(player_kore, (int, float)), "Kore must be numeric."
         spawn_cost = self._config.spawn_cost
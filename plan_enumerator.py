@@ -0,0 +1,115 @@
+# 飛行計画の列挙
+
+from functools import lru_cache
+import heapq
+import math
+from typing import Dict, FrozenSet, Generator, List, Optional, Set, Tuple
+from cell import Field
+from compiled_plan import DIRECTIONS, DX, DY
+from flight_plan import FlightPlan
+from helpers import max_flight_plan_len_for_ship_count
+from point import Point
+
+@lru_cache(maxsize=None)
+def _steps(size: int) -> List[List[int]]:
+    """flat index after one move from each flat index, by direction code"""
+    return [
+        [((x + int(DX[direction])) % size) * size + (y + int(DY[direction])) % size for x in range(size) for y in range(size)]
+        for direction in range(4)
+    ]
+
+def enumerate_plans(
+    start: Point,
+    field: Field,
+    ship_count: int,
+    *,
+    max_turns: Optional[int] = None,
+    limit: int = 2000,
+    returning: bool = False
+) -> Generator[FlightPlan, None, None]:
+    """
+    every legal plan (without "C") of the fleet up to max_flight_plan_len_for_ship_count(ship_count)
+    plans are generated in order of the turns spent on the explicit part and at most limit are yielded
+
+    ex) "N", "N2E", "N2E3S", ...: segments of a direction and a run, the last direction is kept until a shipyard
+        (a run after the last direction, "N2E3", only lengthens the tail and is not generated)
+
+    max_turns: turns of the explicit part (default: size)
+    returning: only plans whose route ends at a shipyard
+    pruned:
+        plans of the same route (the shorter command is kept)
+        routes that visit the same cells and end at the same point as an earlier one, not in fewer turns
+        prefixes that already stop at a shipyard (every extension has the same route)
+        prefixes that reach the same point in the same direction over the same cells as an earlier one
+    """
+    assert ship_count >= 1, f"ship_count: {ship_count} must be positive"
+    assert limit >= 0, f"limit: {limit} must not be negative"
+    if limit == 0:
+        return
+    size = field.size
+    max_len = max_flight_plan_len_for_ship_count(ship_count)
+    max_turns = size if max_turns is None else max_turns
+    shipyards = field.shipyard_layout()
+    # moves of the last direction after the plan is consumed (CompiledPlan.route_directions)
+    tail = 1 + math.ceil((size - 1) / 2)
+    steps = _steps(size)
+
+    routes: Set[Tuple[int, ...]] = set()
+    # (cells, end) -> turns of the route
+    covered: Dict[Tuple[FrozenSet[int], int], int] = {}
+    # (point, direction, cells) of prefixes already expanded
+    expanded: Set[Tuple[int, int, FrozenSet[int]]] = set()
+
+    # (turns, command, last direction, route of the command without its last direction)
+    heap = [(0, "", -1, (start.index,))]
+    count = 0
+    while heap:
+        turns, command, last, path = heapq.heappop(heap)
+        cells = frozenset(path[1:])
+        if (path[-1], last, cells) in expanded:
+            continue
+        expanded.add((path[-1], last, cells))
+
+        # the last direction of a plan continues until a shipyard
+        if len(command) + 1 <= max_len:
+            for direction in range(4):
+                if direction == last:
+                    continue
+                route = list(path)
+                step = steps[direction]
+                for _ in range(tail):
+                    route.append(step[route[-1]])
+                    if route[-1] in shipyards:
+                        break
+                route = tuple(route)
+                if route in routes:
+                    continue
+                routes.add(route)
+                end = route[-1]
+                if returning and end not in shipyards:
+                    continue
+                dominance = (frozenset(route[1:]), end)
+                if covered.get(dominance, len(route)) <= len(route) - 1:
+                    continue
+                covered[dominance] = len(route) - 1
+                plan_type = "RETURN" if end in shipyards else "ONEWAY"
+                yield FlightPlan(command + DIRECTIONS[direction], start, field, plan_type)
+                count += 1
+                if count >= limit:
+                    return
+
+        # a segment is a direction and a run (moves = run + 1), the plan still needs its last direction
+        for direction in range(4):
+            if direction == last:
+                continue
+            step = steps[direction]
+            segment = list(path)
+            for moves in range(1, max_turns - turns + 1):
+                text = DIRECTIONS[direction] + (str(moves - 1) if moves > 1 else "")
+                if len(command) + len(text) + 1 > max_len:
+                    break
+                segment.append(step[segment[-1]])
+                # every extension would stop here too
+                if segment[-1] in shipyards:
+                    break
+                heapq.heappush(heap, (turns + moves, command + text, direction, tuple(segment)))
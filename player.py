@@ -20,6 +20,13 @@ class Player:
         self.need_shipyard = 0
         self.counter = False
 
+    def clone(self, shipyards: Dict[str, Shipyard], fleets: Dict[str, Fleet]) -> "Player":
+        """copy with the given (already cloned) pieces; cached values are not copied"""
+        player = Player(self._player_id, self._kore, shipyards, fleets, self._config)
+        player.need_shipyard = self.need_shipyard
+        player.counter = self.counter
+        return player
+
     @property
     def player_id(self) -> int:
         return self._player_id
@@ -1,5 +1,6 @@
 from enum import Enum
-from typing import Tuple, List
+import numpy as np
+from typing import Dict, List, Tuple
 
 class Direction(Enum):
     """
@@ -42,11 +43,66 @@ class Direction(Enum):
         return [cls.N,cls.E,cls.S,cls.W]
 
 class Point:
-    def __init__(self, x: int, y: int, size: int):
-        self._x = x % size
-        self._y = y % size
-        self._size = size
-    
+    """
+    interned point of a size x size torus, Point(x, y, size) returns the same object for the same cell
+    points of a size are numbered x * size + y (the order of np.ndarray[x, y].ravel())
+    """
+    __slots__ = ("_x", "_y", "_size", "_index", "_hash", "_adjacent")
+
+    # size -> points by index
+    _tables: Dict[int, List["Point"]] = {}
+    # size -> distances between point indexes
+    _distance_matrices: Dict[int, np.ndarray] = {}
+    _distance_rows: Dict[int, List[List[int]]] = {}
+
+    def __new__(cls, x: int, y: int, size: int):
+        try:
+            table = cls._tables[size]
+        except KeyError:
+            table = cls._build(size)
+        return table[x % size * size + y % size]
+
+    @classmethod
+    def _build(cls, size: int) -> List["Point"]:
+        table = []
+        for x in range(size):
+            for y in range(size):
+                point = object.__new__(cls)
+                point._x = x
+                point._y = y
+                point._size = size
+                point._index = x * size + y
+                point._hash = hash((x, y))
+                point._adjacent = None
+                table.append(point)
+        cls._tables[size] = table
+
+        coordinate = np.arange(size)
+        delta = np.abs(coordinate[:, None] - coordinate[None, :])
+        delta = np.minimum(delta, size - delta)
+        x, y = np.divmod(np.arange(size * size), size)
+        matrix = delta[x[:, None], x[None, :]] + delta[y[:, None], y[None, :]]
+        cls._distance_matrices[size] = matrix
+        cls._distance_rows[size] = matrix.tolist()
+        return table
+
+    @classmethod
+    def table(cls, size: int) -> List["Point"]:
+        """all points of the size by index"""
+        try:
+            return cls._tables[size]
+        except KeyError:
+            return cls._build(size)
+
+    @classmethod
+    def distance_matrix(cls, size: int) -> np.ndarray:
+        """(size * size, size * size) toroidal distances by index"""
+        cls.table(size)
+        return cls._distance_matrices[size]
+
+    def __reduce__(self):
+        return Point, (self._x, self._y, self._size)
+
     @property
     def x(self) -> int:
         return self._x
@@ -54,29 +110,36 @@ class Point:
     @property
     def y(self) -> int:
         return self._y
+
+    @property
+    def index(self) -> int:
+        return self._index
     
     def to_tuple(self) -> Tuple[int, int]:
         return self._x, self._y
 
     @property
     def adjacent_point(self) -> List["Point"]:
-        points = []
-        for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
-            points.append(Point(self.x + dx, self.y + dy, self._size))
-        return points
+        if self._adjacent is None:
+            self._adjacent = [Point(self._x + dx, self._y + dy, self._size) for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]]
+        return list(self._adjacent)
     
     def __eq__(self, point: "Point"):
+        if self is point:
+            return True
         if not isinstance(point, Point):
             return False
-        return self.x == point.x and self.y == point.y
+        return self._x == point._x and self._y == point._y
     
     def __hash__(self):
-        return hash((self.x, self.y))
+        return self._hash
     
     def distance(self, point: "Point") -> int:
+        if point._size == self._size:
+            return self._distance_rows[self._size][self._index][point._index]
         dx = min(abs(self.x - point.x), min(self.x, point.x) + self._size - max(self.x, point.x))
         dy = min(abs(self.y - point.y), min(self.y, point.y) + self._size - max(self.y, point.y))
         return dx + dy
     
     def __repr__(self):
-        return f"(x={self.x}, y={self.y})"
\ No newline at end of file
+        return f"(x={self.x}, y={self.y})"
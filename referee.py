@@ -0,0 +1,209 @@
+"""local referee and self-play tournament (no kaggle_environments needed)
+
+usage: python referee.py main:rule_agent main:rule_agent --games 100 --workers 8 --output results.json
+
+Games are advanced with Board.next, so they follow the rules of this repository's simulator.
+Seats are swapped every other game.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import importlib
+import json
+import random
+import time
+from typing import Callable, Dict, List, Optional
+from action import Action
+from board import Board
+from point import Direction
+from helpers import is_valid_flight_plan
+
+DEFAULT_CONFIG = {
+    "agentTimeout": 60, "startingKore": 2750, "size": 21, "spawnCost": 10, "convertCost": 50,
+    "regenRate": 0.02, "maxRegenCellKore": 500, "randomSeed": 0, "episodeSteps": 400, "actTimeout": 3
+}
+PLAYER_KORE = 500
+
+def initial_observation(config: dict, seed: int) -> dict:
+    """
+    point symmetric random kore and one shipyard (0 ships) for each player
+    the kore of a half board sums to startingKore
+    """
+    rng = random.Random(seed)
+    size = config["size"]
+    half = [[0.0] * size for _ in range(size)]
+    for _ in range(size):
+        cx, cy = rng.randrange(size), rng.randrange(size // 2 + 1)
+        radius = rng.randint(1, 4)
+        value = rng.random() ** 2 * 300
+        for x in range(cx - radius, cx + radius + 1):
+            for y in range(cy - radius, cy + radius + 1):
+                distance = abs(x - cx) + abs(y - cy)
+                if distance <= radius:
+                    half[x % size][y % size] += value / (1 + distance)
+
+    kore = [0.0] * (size * size)
+    total = sum(half[x][y] for x in range(size) for y in range(size // 2 + 1))
+    for x in range(size):
+        for y in range(size // 2 + 1):
+            value = round(half[x][y] * config["startingKore"] / total, 3)
+            kore[y * size + x] = value
+            kore[(size - 1 - y) * size + (size - 1 - x)] = value
+
+    starts = [(size // 4, size - 1 - size // 4), (size - 1 - size // 4, size // 4)]
+    players = []
+    for player_id, (x, y) in enumerate(starts):
+        kore[y * size + x] = 0.0
+        players.append([PLAYER_KORE, {f"0-{player_id + 1}": [y * size + x, 0, 0]}, {}])
+    return {"step": 0, "player": 0, "kore": kore, "remainingOverageTime": 60, "players": players}
+
+def to_observation(board: Board) -> dict:
+    """observation in the shape Board.__init__ consumes"""
+    size = board.configuration.size
+    kore = [0.0] * (size * size)
+    for x in range(size):
+        for y in range(size):
+            kore[y * size + x] = board.field[x, y].kore
+
+    players = []
+    for player in board.players.values():
+        shipyards = {
+            shipyard.id: [shipyard.y * size + shipyard.x, shipyard.ship_count, shipyard.turns_controlled]
+            for shipyard in player.shipyards
+        }
+        fleets = {
+            fleet.id: [fleet.y * size + fleet.x, fleet.kore, fleet.ship_count,
+                        Direction[fleet.direction].value, fleet.flight_plan]
+            for fleet in player.fleets
+        }
+        players.append([player.kore, shipyards, fleets])
+    return {"step": board.step, "player": 0, "kore": kore, "remainingOverageTime": 60, "players": players}
+
+def parse_action(command: str) -> Optional[Action]:
+    """SPAWN_{n} or LAUNCH_{n}_{plan}, None if invalid"""
+    try:
+        parts = command.split("_")
+        num_ships = int(parts[1])
+    except (AttributeError, IndexError, ValueError):
+        return None
+    if num_ships <= 0:
+        return None
+
+    if parts[0] == "SPAWN" and len(parts) == 2:
+        return Action("SPAWN", command, num_ships, None)
+    if parts[0] == "LAUNCH" and len(parts) == 3:
+        flight_plan = parts[2]
+        if flight_plan and flight_plan[0] in "NESW" and is_valid_flight_plan(flight_plan):
+            return Action("LAUNCH", command, num_ships, flight_plan)
+    return None
+
+def load_agent(spec: str) -> Callable:
+    """'module:function' -> agent"""
+    module, function = spec.split(":")
+    return getattr(importlib.import_module(module), function)
+
+def play_game(agents: List[Callable], seed: int, config: Optional[dict] = None) -> dict:
+    config = dict(config or DEFAULT_CONFIG)
+    obs = initial_observation(config, seed)
+    latency = [[] for _ in agents]
+    errors = [None for _ in agents]
+
+    while obs["step"] < config["episodeSteps"] - 1:
+        board = Board(obs, config)
+        for player_id, agent in enumerate(agents):
+            player_obs = dict(obs, player=player_id)
+            start = time.perf_counter()
+            try:
+                actions = agent(player_obs, dict(config))
+            except Exception as e:
+                errors[player_id] = repr(e)
+                break
+            finally:
+                latency[player_id].append(round((time.perf_counter() - start) * 1000, 2))
+
+            for shipyard_id, command in (actions or {}).items():
+                shipyard = board.shipyards.get(shipyard_id)
+                if shipyard is not None and shipyard.player_id == player_id:
+                    shipyard.next_action = parse_action(command)
+        if any(errors):
+            break
+
+        generator = board.next()
+        next(generator)
+        obs = to_observation(next(generator))
+        alive = [bool(shipyards or fleets) for _, shipyards, fleets in obs["players"]]
+        if not all(alive):
+            break
+
+    kore = [player_kore for player_kore, _, _ in obs["players"]]
+    alive = [bool(shipyards or fleets) and errors[i] is None for i, (_, shipyards, fleets) in enumerate(obs["players"])]
+    score = [kore[i] if alive[i] else -1 for i in range(len(agents))]
+    best = max(score)
+    winner = score.index(best) if score.count(best) == 1 else None
+    return {
+        "seed": seed,
+        "turns": obs["step"],
+        "kore": kore,
+        "alive": alive,
+        "winner": winner,
+        "errors": errors,
+        "latency_ms": latency
+    }
+
+def _play(args) -> dict:
+    specs, seed, config = args
+    return play_game([load_agent(spec) for spec in specs], seed, config)
+
+def run_tournament(specs: List[str], games: int, workers: Optional[int] = None,
+                    seed: int = 0, config: Optional[dict] = None) -> dict:
+    # agent index of each seat, swapped every other game
+    orders = [[0, 1] if i % 2 == 0 else [1, 0] for i in range(games)]
+    tasks = [([specs[agent] for agent in order], seed + i, config) for i, order in enumerate(orders)]
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(_play, tasks))
+
+    summary: Dict[str, Dict[str, float]] = {}
+    for agent, spec in enumerate(specs):
+        wins = draws = 0
+        kore = []
+        latency = []
+        for order, result in zip(orders, results):
+            player_id = order.index(agent)
+            wins += result["winner"] == player_id
+            draws += result["winner"] is None
+            kore.append(result["kore"][player_id])
+            latency += result["latency_ms"][player_id]
+        latency.sort()
+        summary[f"{agent}:{spec}"] = {
+            "win_rate": wins / games,
+            "draw_rate": draws / games,
+            "mean_kore": sum(kore) / games,
+            "latency_mean_ms": sum(latency) / len(latency) if latency else 0,
+            "latency_p95_ms": latency[int(len(latency) * 0.95)] if latency else 0,
+            "latency_max_ms": latency[-1] if latency else 0
+        }
+
+    games_result = [dict(result, agents=seats) for (seats, _, _), result in zip(tasks, results)]
+    return {"summary": summary, "games": games_result}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("agents", nargs=2, help="module:function")
+    parser.add_argument("--games", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--steps", type=int, default=DEFAULT_CONFIG["episodeSteps"])
+    parser.add_argument("--output", default="results.json")
+    args = parser.parse_args()
+
+    config = dict(DEFAULT_CONFIG, episodeSteps=args.steps)
+    result = run_tournament(args.agents, args.games, args.workers, args.seed, config)
+    with open(args.output, "w") as f:
+        json.dump(result, f)
+
+    for name, summary in result["summary"].items():
+        print(f"{name}: win {summary['win_rate']:.2f}, kore {summary['mean_kore']:.0f}, " \
+            f"latency mean {summary['latency_mean_ms']:.1f} ms, p95 {summary['latency_p95_ms']:.1f} ms")
+
+if __name__ == "__main__":
+    main()
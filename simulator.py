@@ -0,0 +1,461 @@
+# 配列ベースのシミュレーション (struct-of-arrays)
+
+from copy import copy
+from functools import lru_cache
+import numpy as np
+from typing import Generator, List, Optional
+from compiled_plan import CompiledPlan
+from configuration import Configuration
+from piece import Fleet, Shipyard
+from player import Player
+from point import Direction
+from snapshot import FieldView
+from helpers import (
+    max_flight_plan_len_for_ship_count,
+    collection_rate_for_ship_count,
+    from_index,
+    to_index,
+    is_valid_flight_plan,
+    max_ships_to_spawn
+)
+
+# N, E, S, W
+DX = np.array([0, 1, 0, -1], dtype=np.int64)
+DY = np.array([-1, 0, 1, 0], dtype=np.int64)
+
+@lru_cache(maxsize=None)
+def rounded_collection_rate(ship_count: int) -> float:
+    return round(collection_rate_for_ship_count(ship_count), 3)
+
+class ArrayState:
+    """game state kept as parallel arrays, stepped with the same rules as Board.next"""
+    def __init__(self, config: Configuration, step: int, kore: np.ndarray, player_kore: List[float]):
+        self._config = config
+        self._step = step
+        self.kore = kore
+        self.player_kore = player_kore
+        self._uid_counter = 0
+
+        # shipyards
+        self.sy_id: List[str] = []
+        self.sy_x = np.zeros(0, dtype=np.int64)
+        self.sy_y = np.zeros(0, dtype=np.int64)
+        self.sy_owner = np.zeros(0, dtype=np.int64)
+        self.sy_ships = np.zeros(0, dtype=np.int64)
+        self.sy_turns = np.zeros(0, dtype=np.int64)
+        self.sy_action: List = []
+        self.sy_origin: List[Optional[Shipyard]] = []
+
+        # fleets
+        self.fl_id: List[str] = []
+        self.fl_x = np.zeros(0, dtype=np.int64)
+        self.fl_y = np.zeros(0, dtype=np.int64)
+        self.fl_owner = np.zeros(0, dtype=np.int64)
+        self.fl_ships = np.zeros(0, dtype=np.int64)
+        self.fl_kore = np.zeros(0, dtype=np.float64)
+        self.fl_dir = np.zeros(0, dtype=np.int64)
+        self.fl_plan: List[CompiledPlan] = []
+        self.fl_plan_index = np.zeros(0, dtype=np.int64)
+        self.fl_plan_turn = np.zeros(0, dtype=np.int64)
+        self.fl_origin: List[Optional[Fleet]] = []
+
+        # fleets destroyed by adjacent damage in the last step (still listed as adjacent fleets)
+        self.fl_alive = np.zeros(0, dtype=bool)
+
+    @property
+    def step(self) -> int:
+        return self._step
+
+    @property
+    def size(self) -> int:
+        return self._config.size
+
+    @classmethod
+    def from_board(cls, board) -> "ArrayState":
+        size = board.configuration.size
+        kore = np.zeros((size, size), dtype=np.float64)
+        for x in range(size):
+            for y in range(size):
+                kore[x, y] = board.field[x, y].kore
+
+        player_kore = [player.kore for player in board.players.values()]
+        state = cls(board.configuration, board.step, kore, player_kore)
+
+        shipyards = list(board.shipyards.values())
+        state.sy_id = [sy.id for sy in shipyards]
+        state.sy_x = np.array([sy.x for sy in shipyards], dtype=np.int64)
+        state.sy_y = np.array([sy.y for sy in shipyards], dtype=np.int64)
+        state.sy_owner = np.array([sy.player_id for sy in shipyards], dtype=np.int64)
+        state.sy_ships = np.array([sy.ship_count for sy in shipyards], dtype=np.int64)
+        state.sy_turns = np.array([sy.turns_controlled for sy in shipyards], dtype=np.int64)
+        state.sy_action = [sy.next_action for sy in shipyards]
+        state.sy_origin = shipyards
+
+        fleets = list(board.fleets.values())
+        state.fl_id = [fleet.id for fleet in fleets]
+        state.fl_x = np.array([fleet.x for fleet in fleets], dtype=np.int64)
+        state.fl_y = np.array([fleet.y for fleet in fleets], dtype=np.int64)
+        state.fl_owner = np.array([fleet.player_id for fleet in fleets], dtype=np.int64)
+        state.fl_ships = np.array([fleet.ship_count for fleet in fleets], dtype=np.int64)
+        state.fl_kore = np.array([fleet.kore for fleet in fleets], dtype=np.float64)
+        state.fl_dir = np.array([Direction[fleet.direction].value for fleet in fleets], dtype=np.int64)
+        state.fl_plan = [fleet.plan for fleet in fleets]
+        state.fl_plan_index = np.array([fleet._plan_index for fleet in fleets], dtype=np.int64)
+        state.fl_plan_turn = np.array([fleet._plan_turn for fleet in fleets], dtype=np.int64)
+        state.fl_origin = fleets
+        state.fl_alive = np.ones(len(fleets), dtype=bool)
+        return state
+
+    def _create_uid(self) -> str:
+        self._uid_counter += 1
+        return f"{self._step + 1}-{self._uid_counter}"
+
+    def _add_shipyard(self, shipyard_id: str, player_id: int, x: int, y: int, ship_count: int, turns_controlled: int) -> None:
+        self.sy_id.append(shipyard_id)
+        self.sy_x = np.append(self.sy_x, x)
+        self.sy_y = np.append(self.sy_y, y)
+        self.sy_owner = np.append(self.sy_owner, player_id)
+        self.sy_ships = np.append(self.sy_ships, ship_count)
+        self.sy_turns = np.append(self.sy_turns, turns_controlled)
+        self.sy_action.append(None)
+        self.sy_origin.append(None)
+
+    def _add_fleet(self, fleet_id: str, player_id: int, x: int, y: int, ship_count: int, direction: int, flight_plan: CompiledPlan) -> None:
+        self.fl_id.append(fleet_id)
+        self.fl_x = np.append(self.fl_x, x)
+        self.fl_y = np.append(self.fl_y, y)
+        self.fl_owner = np.append(self.fl_owner, player_id)
+        self.fl_ships = np.append(self.fl_ships, ship_count)
+        self.fl_kore = np.append(self.fl_kore, 0.0)
+        self.fl_dir = np.append(self.fl_dir, direction)
+        self.fl_plan.append(flight_plan)
+        self.fl_plan_index = np.append(self.fl_plan_index, 0)
+        self.fl_plan_turn = np.append(self.fl_plan_turn, 0)
+        self.fl_origin.append(None)
+        self.fl_alive = np.append(self.fl_alive, True)
+
+    def _keep_shipyards(self, keep: np.ndarray) -> None:
+        index = np.flatnonzero(keep)
+        self.sy_id = [self.sy_id[i] for i in index]
+        self.sy_x = self.sy_x[index]
+        self.sy_y = self.sy_y[index]
+        self.sy_owner = self.sy_owner[index]
+        self.sy_ships = self.sy_ships[index]
+        self.sy_turns = self.sy_turns[index]
+        self.sy_action = [self.sy_action[i] for i in index]
+        self.sy_origin = [self.sy_origin[i] for i in index]
+
+    def _keep_fleets(self, keep: np.ndarray) -> None:
+        index = np.flatnonzero(keep)
+        self.fl_id = [self.fl_id[i] for i in index]
+        self.fl_x = self.fl_x[index]
+        self.fl_y = self.fl_y[index]
+        self.fl_owner = self.fl_owner[index]
+        self.fl_ships = self.fl_ships[index]
+        self.fl_kore = self.fl_kore[index]
+        self.fl_dir = self.fl_dir[index]
+        self.fl_plan = [self.fl_plan[i] for i in index]
+        self.fl_plan_index = self.fl_plan_index[index]
+        self.fl_plan_turn = self.fl_plan_turn[index]
+        self.fl_origin = [self.fl_origin[i] for i in index]
+        self.fl_alive = self.fl_alive[index]
+
+    def shipyard_grid(self) -> np.ndarray:
+        """shipyard index on each cell (-1: empty)"""
+        grid = np.full((self.size, self.size), -1, dtype=np.int64)
+        grid[self.sy_x, self.sy_y] = np.arange(len(self.sy_id))
+        return grid
+
+    def fleet_grid(self) -> np.ndarray:
+        """alive fleet index on each cell (-1: empty)"""
+        grid = np.full((self.size, self.size), -1, dtype=np.int64)
+        index = np.flatnonzero(self.fl_alive)
+        grid[self.fl_x[index], self.fl_y[index]] = index
+        return grid
+
+    def _player_actions(self, player_id: int) -> None:
+        spawn_cost = self._config.spawn_cost
+
+        for i in range(len(self.sy_id)):
+            action = self.sy_action[i]
+            if self.sy_owner[i] != player_id or action is None or action.num_ships == 0:
+                continue
+
+            # Spawn ships
+            if (action.action_type == "SPAWN"
+                    and self.player_kore[player_id] >= spawn_cost * action.num_ships
+                    and action.num_ships <= max_ships_to_spawn(self.sy_turns[i])):
+                self.player_kore[player_id] -= spawn_cost * action.num_ships
+                self.sy_ships[i] += action.num_ships
+
+            # Launch
+            elif action.action_type == "LAUNCH" and self.sy_ships[i] >= action.num_ships:
+                self.sy_ships[i] -= action.num_ships
+                flight_plan = action.flight_plan
+                if not flight_plan or not is_valid_flight_plan(flight_plan):
+                    continue
+                max_flight_plan_len = max_flight_plan_len_for_ship_count(action.num_ships)
+                if len(flight_plan) > max_flight_plan_len:
+                    flight_plan = flight_plan[:max_flight_plan_len]
+                self._add_fleet(self._create_uid(), player_id, int(self.sy_x[i]), int(self.sy_y[i]),
+                                action.num_ships, Direction[flight_plan[0]].value, CompiledPlan.compile(flight_plan))
+
+        # Clear the shipyard's action
+        owned = self.sy_owner == player_id
+        for i in np.flatnonzero(owned):
+            self.sy_action[i] = None
+        self.sy_turns[owned] += 1
+
+    def _player_flight_plans(self, player_id: int) -> None:
+        convert_cost = self._config.convert_cost
+        sy_grid = self.shipyard_grid()
+
+        for i in np.flatnonzero((self.fl_owner == player_id) & self.fl_alive):
+            plan, index, turn = self.fl_plan[i], int(self.fl_plan_index[i]), int(self.fl_plan_turn[i])
+
+            # convert
+            if (plan.convert_at(index, turn)
+                    and self.fl_ships[i] >= convert_cost
+                    and sy_grid[self.fl_x[i], self.fl_y[i]] < 0):
+                x, y = int(self.fl_x[i]), int(self.fl_y[i])
+                self.player_kore[player_id] += float(self.fl_kore[i])
+                self.kore[x, y] = 0
+                self._add_shipyard(self._create_uid(), player_id, x, y, int(self.fl_ships[i]) - convert_cost, 0)
+                sy_grid[x, y] = len(self.sy_id) - 1
+                self.fl_alive[i] = False
+                continue
+
+            # move
+            direction, self.fl_plan_index[i], self.fl_plan_turn[i] = plan.advance(index, turn)
+            if direction >= 0:
+                self.fl_dir[i] = direction
+
+    def _merge_fleets(self) -> None:
+        size = self.size
+        index = np.flatnonzero(self.fl_alive)
+        key = self.fl_owner[index] * size * size + self.fl_x[index] * size + self.fl_y[index]
+        if len(np.unique(key)) == len(key):
+            return
+
+        order = np.lexsort((index, -self.fl_kore[index], -self.fl_ships[index], key))
+        key, index = key[order], index[order]
+        first = np.ones(len(key), dtype=bool)
+        first[1:] = key[1:] != key[:-1]
+        winner = index[np.maximum.accumulate(np.where(first, np.arange(len(key)), 0))]
+
+        losers = ~first
+        np.add.at(self.fl_kore, winner[losers], self.fl_kore[index[losers]])
+        np.add.at(self.fl_ships, winner[losers], self.fl_ships[index[losers]])
+        self.fl_alive[index[losers]] = False
+
+    def _resolve_collisions(self) -> None:
+        size = self.size
+        index = np.flatnonzero(self.fl_alive)
+        cell = self.fl_x[index] * size + self.fl_y[index]
+        if len(np.unique(cell)) == len(cell):
+            return
+
+        order = np.lexsort((index, -self.fl_ships[index], cell))
+        cell, index = cell[order], index[order]
+        first = np.ones(len(cell), dtype=bool)
+        first[1:] = cell[1:] != cell[:-1]
+        head = np.maximum.accumulate(np.where(first, np.arange(len(cell)), 0))
+        collided = np.bincount(head, minlength=len(cell))[head] > 1
+
+        top = index[head]
+        runner = np.zeros(len(cell), dtype=bool)
+        runner[1:] = first[:-1] & ~first[1:]
+        tie = np.zeros(len(cell), dtype=bool)
+        tie[head[runner]] = self.fl_ships[index[runner]] == self.fl_ships[top[runner]]
+        tie = tie[head]
+
+        # winner takes damage from the largest enemy fleet and collects the kore of the others
+        has_winner = runner & ~tie
+        self.fl_ships[top[has_winner]] -= self.fl_ships[index[has_winner]]
+
+        losers = collided & ~first & ~tie
+        losers_order = np.argsort(index[losers], kind="stable")
+        np.add.at(self.fl_kore, top[losers][losers_order], self.fl_kore[index[losers]][losers_order])
+
+        # all fleets destroyed
+        destroyed = collided & tie
+        group_order = np.full(len(cell), len(self.fl_id), dtype=np.int64)
+        np.minimum.at(group_order, head, index)
+        sy_grid = self.shipyard_grid()
+        for i in sorted(np.flatnonzero(destroyed), key=lambda i: (group_order[head[i]], index[i])):
+            fleet = index[i]
+            x, y = self.fl_x[fleet], self.fl_y[fleet]
+            shipyard = sy_grid[from_index(to_index(x, y, size), size)]
+            if shipyard >= 0:
+                self.player_kore[self.sy_owner[shipyard]] += float(self.fl_kore[fleet])
+            else:
+                self.kore[x, y] += self.fl_kore[fleet]
+
+        self.fl_alive[index[losers | destroyed]] = False
+
+    def _shipyard_arrival(self) -> None:
+        fleet_grid = self.fleet_grid()
+        arrived = fleet_grid[self.sy_x, self.sy_y]
+
+        captured = np.zeros(len(self.sy_id), dtype=bool)
+        for i in np.flatnonzero(arrived >= 0):
+            fleet = arrived[i]
+            fleet_owner, fleet_kore = int(self.fl_owner[fleet]), float(self.fl_kore[fleet])
+            if fleet_owner != self.sy_owner[i]:
+                if self.fl_ships[fleet] > self.sy_ships[i]:
+                    count = int(self.fl_ships[fleet] - self.sy_ships[i])
+                    captured[i] = True
+                    self._add_shipyard(self._create_uid(), fleet_owner, int(self.sy_x[i]), int(self.sy_y[i]), count, 1)
+                    self.player_kore[fleet_owner] += fleet_kore
+                else:
+                    self.sy_ships[i] -= self.fl_ships[fleet]
+                    self.player_kore[self.sy_owner[i]] -= fleet_kore
+            else:
+                self.player_kore[self.sy_owner[i]] += fleet_kore
+                self.sy_ships[i] += self.fl_ships[fleet]
+            self.fl_alive[fleet] = False
+
+        if captured.any():
+            captured = np.append(captured, np.zeros(len(self.sy_id) - len(captured), dtype=bool))
+            self._keep_shipyards(~captured)
+
+    def _adjacent_damage(self) -> None:
+        size = self.size
+        fleet_grid = self.fleet_grid()
+        attacker = np.flatnonzero(self.fl_alive)
+        ship_count = self.fl_ships.copy()
+
+        damage = np.zeros(len(self.fl_id), dtype=np.int64)
+        pairs = []
+        for dx, dy in zip(DX, DY):
+            victim = fleet_grid[(self.fl_x[attacker] + dx) % size, (self.fl_y[attacker] + dy) % size]
+            hit = victim >= 0
+            hit[hit] = self.fl_owner[victim[hit]] != self.fl_owner[attacker[hit]]
+            np.add.at(damage, victim[hit], ship_count[attacker[hit]])
+            pairs.append((attacker[hit], victim[hit]))
+
+        hit_victim = damage > 0
+        destroyed = hit_victim & (damage >= ship_count)
+        survived = hit_victim & ~destroyed
+        self.fl_ships[survived] -= damage[survived]
+        if not destroyed.any():
+            return
+
+        # destroyed fleets drop half of their kore
+        to_split = self.fl_kore / 2
+        self.kore[self.fl_x[destroyed], self.fl_y[destroyed]] += to_split[destroyed]
+        self.fl_alive[destroyed] = False
+
+        # the other half is distributed to attackers
+        attackers = np.concatenate([a for a, _ in pairs])
+        victims = np.concatenate([v for _, v in pairs])
+        share = destroyed[victims]
+        attackers, victims = attackers[share], victims[share]
+        order = np.lexsort((victims, attackers))
+        attackers, victims = attackers[order], victims[order]
+        amount = to_split[victims] * ship_count[attackers] / damage[victims]
+
+        alive = self.fl_alive[attackers]
+        gain = np.zeros(len(self.fl_id), dtype=np.float64)
+        np.add.at(gain, attackers[alive], amount[alive])
+        gained = np.unique(attackers[alive])
+        self.fl_kore[gained] += gain[gained]
+
+        x, y = from_index(to_index(self.fl_x[victims[~alive]], self.fl_y[victims[~alive]], size), size)
+        np.add.at(self.kore, (x, y), amount[~alive])
+
+    def _collect_kore(self) -> None:
+        index = np.flatnonzero(self.fl_alive)
+        x, y = self.fl_x[index], self.fl_y[index]
+        rate = np.array([rounded_collection_rate(ship_count) for ship_count in self.fl_ships[index].tolist()])
+        delta_kore = self.kore[x, y] * rate
+        collect = delta_kore > 0
+        self.fl_kore[index[collect]] += delta_kore[collect]
+        self.kore[x[collect], y[collect]] -= delta_kore[collect]
+
+    def _regenerate_kore(self) -> None:
+        regen = self.kore < self._config.max_cell_kore
+        regen[self.sy_x, self.sy_y] = False
+        regen[self.fl_x[self.fl_alive], self.fl_y[self.fl_alive]] = False
+        next_kore = self.kore[regen] * (1 + self._config.regen_rate)
+        self.kore[regen] = [round(kore, 3) for kore in next_kore.tolist()]
+
+    def next(self) -> None:
+        """advance one turn (in place)"""
+        self._uid_counter = 0
+        self._keep_fleets(self.fl_alive)
+
+        for player_id in range(len(self.player_kore)):
+            self._player_actions(player_id)
+            self._player_flight_plans(player_id)
+
+        # move
+        moving = self.fl_alive
+        self.fl_x[moving] = (self.fl_x[moving] + DX[self.fl_dir[moving]]) % self.size
+        self.fl_y[moving] = (self.fl_y[moving] + DY[self.fl_dir[moving]]) % self.size
+
+        self._merge_fleets()
+        self._resolve_collisions()
+        self._shipyard_arrival()
+
+        # fleets after arrival are listed as adjacent fleets of their neighbour cells
+        self._keep_fleets(self.fl_alive)
+        self._adjacent_damage()
+        self._collect_kore()
+        self._regenerate_kore()
+        self._step += 1
+
+    def to_board(self, template):
+        """build a Board-compatible object from the current arrays"""
+        config = self._config
+        size = config.size
+        board = copy(template)
+        board._step = self._step
+        board._players = {}
+        board._shipyards = {}
+        board._fleets = {}
+
+        for player_id, player_kore in enumerate(self.player_kore):
+            board._players[player_id] = Player(player_id, player_kore, {}, {}, config)
+
+        for i, (shipyard_id, x, y, player_id, ship_count, turns_controlled) in enumerate(zip(
+            self.sy_id, self.sy_x.tolist(), self.sy_y.tolist(), self.sy_owner.tolist(),
+            self.sy_ships.tolist(), self.sy_turns.tolist()
+        )):
+            shipyard = Shipyard(shipyard_id, player_id, x, y, ship_count, turns_controlled, config)
+            origin = self.sy_origin[i]
+            if origin is not None and origin._scratch is not None:
+                shipyard.incoming_allied_fleets = list(origin._scratch.incoming_allied_fleets)
+                shipyard.incoming_hostile_fleets = list(origin._scratch.incoming_hostile_fleets)
+            board._shipyards[shipyard_id] = shipyard
+            board._players[player_id]._shipyards[shipyard_id] = shipyard
+
+        adjacent = {}
+        for i, (fleet_id, x, y, player_id, fleet_kore, ship_count, direction) in enumerate(zip(
+            self.fl_id, self.fl_x.tolist(), self.fl_y.tolist(), self.fl_owner.tolist(),
+            self.fl_kore.tolist(), self.fl_ships.tolist(), self.fl_dir.tolist()
+        )):
+            fleet = Fleet(fleet_id, player_id, x, y, fleet_kore, ship_count,
+                        Direction(direction).name, self.fl_plan[i], config)
+            fleet._plan_index = int(self.fl_plan_index[i])
+            fleet._plan_turn = int(self.fl_plan_turn[i])
+            origin = self.fl_origin[i]
+            if origin is not None:
+                fleet._route = origin._route
+                fleet._expected_kore = origin._expected_kore
+                fleet._convert_attack = origin._convert_attack
+            if self.fl_alive[i]:
+                board._fleets[fleet_id] = fleet
+                board._players[player_id]._fleets[fleet_id] = fleet
+            for dx, dy in [(1, 0), (-1, 0), (0, 1), (0, -1)]:
+                adjacent.setdefault(((x + dx) % size, (y + dy) % size), []).append(fleet)
+
+        board._field = FieldView(
+            size, self.kore.copy(), list(board._shipyards.values()), list(board._fleets.values()), adjacent
+        )
+        return board
+
+    def boards(self, template) -> Generator:
+        while True:
+            self.next()
+            yield self.to_board(template)
@@ -0,0 +1,342 @@
+# 未来の盤面のスナップショット
+
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+from cell import Cell, Field
+from piece import Fleet, Shipyard
+
+class FieldView(Field):
+    """read-only Field whose cells are created on first access"""
+    def __init__(
+            self,
+            size: int,
+            kore: np.ndarray,
+            shipyards: List[Shipyard],
+            fleets: List[Fleet],
+            adjacent_fleets: Dict[Tuple[int, int], List[Fleet]]
+    ):
+        self._size = size
+        self._kore = kore
+        self._kore_list = kore.tolist()
+        self._shipyards = shipyards
+        self._fleets = fleets
+        self._adjacent_fleets = adjacent_fleets
+        self._shipyard_at = {shipyard.point.to_tuple(): shipyard for shipyard in shipyards}
+        self._fleet_at = {fleet.point.to_tuple(): fleet for fleet in fleets}
+        self._cells: Dict[Tuple[int, int], Cell] = {}
+        self._nearest_index: Dict[Tuple[str, Optional[int]], tuple] = {}
+        self._layout = None
+
+    def __getitem__(self, item) -> Cell:
+        x, y = item
+        x, y = x % self._size, y % self._size
+        try:
+            return self._cells[x, y]
+        except KeyError:
+            pass
+
+        cell = Cell(x, y, self._kore_list[x][y], self._shipyard_at.get((x, y)), self._fleet_at.get((x, y)), self._size)
+        cell._adjacent_fleets = self._adjacent_fleets.setdefault((x, y), [])
+        self._cells[x, y] = cell
+        return cell
+
+    def clone(self, shipyards: Callable[[Shipyard], Shipyard], fleets: Callable[[Fleet], Fleet]) -> "FieldView":
+        return FieldView(
+            self._size,
+            self.kore_array(),
+            [shipyards(shipyard) for shipyard in self._shipyards],
+            [fleets(fleet) for fleet in self._fleets],
+            {
+                position: [fleets(fleet) for fleet in adjacent_fleets]
+                for position, adjacent_fleets in self.adjacent_fleet_map().items()
+            }
+        )
+
+    def kore_array(self) -> np.ndarray:
+        kore = self._kore.copy()
+        for (x, y), cell in self._cells.items():
+            kore[x, y] = cell.kore
+        return kore
+
+    def adjacent_fleet_map(self) -> Dict[Tuple[int, int], List[Fleet]]:
+        return {position: fleets for position, fleets in self._adjacent_fleets.items() if fleets}
+
+class FieldHistory:
+    """
+    turn-1 field and per-turn deltas of kore and shipyards
+    fleets are copied in full every turn: every fleet moves each turn, so a delta would hold all of them anyway
+    """
+    def __init__(self, size: int):
+        self._size = size
+        self._base_turn: Optional[int] = None
+        self._last_turn: Optional[int] = None
+        self._kore_base: Optional[np.ndarray] = None
+        self._kore_last: Optional[np.ndarray] = None
+
+        # turn -> changed cells (flat index, kore)
+        self._kore_delta: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        # turn -> {shipyard id: (recorded turn, shipyard) or None}
+        self._shipyard_delta: Dict[int, Dict[str, Optional[Tuple[int, Shipyard]]]] = {}
+        self._shipyard_last: Dict[str, Tuple[int, Shipyard]] = {}
+        # turn -> (fleets, adjacent fleets of each cell), full copies
+        self._fleets: Dict[int, Tuple[List[Fleet], Dict[Tuple[int, int], List[Fleet]]]] = {}
+        self._views: Dict[int, FieldView] = {}
+
+    def __len__(self) -> int:
+        return len(self._fleets)
+
+    def __contains__(self, turn: int) -> bool:
+        return turn in self._fleets
+
+    def add(self, turn: int, field: Field) -> None:
+        assert self._last_turn is None or turn == self._last_turn + 1, "turns must be added in order"
+        kore = field.kore_array()
+        if self._base_turn is None:
+            self._base_turn = turn
+            self._kore_base = kore
+        else:
+            changed = np.flatnonzero(kore != self._kore_last)
+            self._kore_delta[turn] = (changed, kore.ravel()[changed])
+        self._kore_last = kore
+
+        delta = {}
+        current = {}
+        for shipyard in field._shipyards:
+            last = self._shipyard_last.get(shipyard.id)
+            if last is not None and _same_shipyard(last[1], shipyard):
+                current[shipyard.id] = last
+            else:
+                current[shipyard.id] = delta[shipyard.id] = (turn, shipyard.clone(scratch=False))
+        for shipyard_id in self._shipyard_last.keys() - current.keys():
+            delta[shipyard_id] = None
+        self._shipyard_delta[turn] = delta
+        self._shipyard_last = current
+
+        copied = {}
+        def copy_fleet(fleet: Fleet) -> Fleet:
+            if id(fleet) not in copied:
+                copied[id(fleet)] = fleet.clone(scratch=False)
+            return copied[id(fleet)]
+        self._fleets[turn] = (
+            [copy_fleet(fleet) for fleet in field._fleets],
+            {
+                position: [copy_fleet(fleet) for fleet in fleets]
+                for position, fleets in field.adjacent_fleet_map().items()
+            }
+        )
+        self._last_turn = turn
+
+    def shift(self) -> None:
+        """drop the first turn, turn t becomes turn t - 1"""
+        if len(self) < 2:
+            self.__init__(self._size)
+            return
+        base, second = self._base_turn, self._base_turn + 1
+        if second in self._kore_delta:
+            changed, value = self._kore_delta.pop(second)
+            self._kore_base = self._kore_base.copy()
+            self._kore_base.ravel()[changed] = value
+
+        shipyards = self._shipyard_delta.pop(base)
+        for shipyard_id, record in self._shipyard_delta.pop(second).items():
+            if record is None:
+                shipyards.pop(shipyard_id, None)
+            else:
+                shipyards[shipyard_id] = record
+        self._shipyard_delta[second] = shipyards
+        del self._fleets[base]
+
+        def renumber(record: Optional[Tuple[int, Shipyard]]) -> Optional[Tuple[int, Shipyard]]:
+            return None if record is None else (record[0] - 1, record[1])
+        self._kore_delta = {turn - 1: delta for turn, delta in self._kore_delta.items()}
+        self._shipyard_delta = {
+            turn - 1: {shipyard_id: renumber(record) for shipyard_id, record in delta.items()}
+            for turn, delta in self._shipyard_delta.items()
+        }
+        self._shipyard_last = {shipyard_id: renumber(record) for shipyard_id, record in self._shipyard_last.items()}
+        self._fleets = {turn - 1: fleets for turn, fleets in self._fleets.items()}
+        self._views = {}
+        self._last_turn -= 1
+
+    def field(self, turn: int) -> Optional[FieldView]:
+        if turn not in self._fleets:
+            return None
+        try:
+            return self._views[turn]
+        except KeyError:
+            pass
+
+        kore = self._kore_base.copy()
+        shipyards = {}
+        for t in range(self._base_turn, turn + 1):
+            if t in self._kore_delta:
+                changed, value = self._kore_delta[t]
+                kore.ravel()[changed] = value
+            for shipyard_id, record in self._shipyard_delta[t].items():
+                if record is None:
+                    shipyards.pop(shipyard_id, None)
+                else:
+                    shipyards[shipyard_id] = record
+
+        shipyard_list = []
+        for recorded_turn, shipyard in shipyards.values():
+            if recorded_turn != turn:
+                shipyard = shipyard.clone(scratch=False)
+                shipyard._turns_controlled += turn - recorded_turn
+            shipyard_list.append(shipyard)
+
+        fleets, adjacent_fleets = self._fleets[turn]
+        view = FieldView(self._size, kore, shipyard_list, fleets, dict(adjacent_fleets))
+        self._views[turn] = view
+        return view
+
+def _same_shipyard(shipyard1: Shipyard, shipyard2: Shipyard) -> bool:
+    return (
+        shipyard1.id == shipyard2.id
+        and shipyard1.player_id == shipyard2.player_id
+        and shipyard1.ship_count == shipyard2.ship_count
+    )
+
+class FutureTensors:
+    """
+    per-turn arrays stacked over the simulated turns, row t is turn t (0: current board)
+    field arrays are (turns + 1, size, size) indexed [turn, x, y], owner is -1 where nothing is
+    player arrays are (turns + 1, players)
+    damage arrays are (turns + 1, players, size, size), ships of the player's fleets that hit the cell
+        direct: fleet on the cell
+        adjacent: fleets next to the cell (Cell.adjacent_fleets, fleets destroyed in the turn included)
+        reachable: max of direct + adjacent over turns 0..t, derived on first access
+    """
+    def __init__(self, size: int, capacity: int = 21):
+        self._size = size
+        self._capacity = capacity
+        self._length = 0
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._reachable: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return self._length
+
+    def _allocate(self, players: int) -> None:
+        shape = (self._capacity, self._size, self._size)
+        self._arrays = {
+            "kore": np.zeros(shape, dtype=np.float64),
+            "shipyard_owner": np.full(shape, -1, dtype=np.int8),
+            "shipyard_ships": np.zeros(shape, dtype=np.int32),
+            "fleet_owner": np.full(shape, -1, dtype=np.int8),
+            "fleet_ships": np.zeros(shape, dtype=np.int32),
+            "player_kore": np.zeros((self._capacity, players), dtype=np.float64),
+            "shipyard_count": np.zeros((self._capacity, players), dtype=np.int32),
+            "field_kore": np.zeros(self._capacity, dtype=np.float64),
+            "direct_damage": np.zeros((self._capacity, players, self._size, self._size), dtype=np.int32),
+            "adjacent_damage": np.zeros((self._capacity, players, self._size, self._size), dtype=np.int32)
+        }
+
+    def _grow(self) -> None:
+        self._capacity *= 2
+        for name, array in self._arrays.items():
+            grown = np.empty((self._capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:len(array)] = array
+            grown[len(array):] = -1 if name.endswith("_owner") else 0
+            self._arrays[name] = grown
+
+    def add(self, turn: int, board) -> None:
+        assert turn == self._length, "turns must be added in order"
+        if not self._arrays:
+            self._allocate(len(board.players))
+        elif turn == self._capacity:
+            self._grow()
+
+        field = board.field
+        kore = field.kore_array()
+        self._arrays["kore"][turn] = kore
+        for shipyard in field._shipyards:
+            self._arrays["shipyard_owner"][turn, shipyard.x, shipyard.y] = shipyard.player_id
+            self._arrays["shipyard_ships"][turn, shipyard.x, shipyard.y] = shipyard.ship_count
+            kore[shipyard.x, shipyard.y] = 0
+        for fleet in field._fleets:
+            self._arrays["fleet_owner"][turn, fleet.x, fleet.y] = fleet.player_id
+            self._arrays["fleet_ships"][turn, fleet.x, fleet.y] = fleet.ship_count
+            self._arrays["direct_damage"][turn, fleet.player_id, fleet.x, fleet.y] = fleet.ship_count
+        for player_id, player in board.players.items():
+            self._arrays["player_kore"][turn, player_id] = player.kore
+            self._arrays["shipyard_count"][turn, player_id] = len(player.shipyards)
+        # summed in cell order, ndarray.sum (pairwise) can differ in the last bits
+        self._arrays["field_kore"][turn] = sum(kore.ravel().tolist()) / self._size / self._size
+
+        # the current board has no adjacent fleets yet, its fleets are used instead
+        if turn == 0:
+            adjacent_fleets = field._fleets
+        else:
+            adjacent_fleets = {id(fleet): fleet for fleets in field.adjacent_fleet_map().values() for fleet in fleets}.values()
+        present = np.zeros(self._arrays["adjacent_damage"].shape[1:], dtype=np.int32)
+        for fleet in adjacent_fleets:
+            present[fleet.player_id, fleet.x, fleet.y] += fleet.ship_count
+        self._arrays["adjacent_damage"][turn] = (
+            np.roll(present, 1, axis=1) + np.roll(present, -1, axis=1)
+            + np.roll(present, 1, axis=2) + np.roll(present, -1, axis=2)
+        )
+        self._length += 1
+        self._reachable = None
+
+    def shift(self) -> None:
+        """drop turn 0, turn t becomes turn t - 1"""
+        length = self._length
+        if length == 0:
+            return
+        for name, array in self._arrays.items():
+            array[:length - 1] = array[1:length]
+            array[length - 1] = -1 if name.endswith("_owner") else 0
+        self._length = length - 1
+        self._reachable = None
+
+    def _view(self, name: str) -> np.ndarray:
+        return self._arrays[name][:self._length]
+
+    @property
+    def kore(self) -> np.ndarray:
+        return self._view("kore")
+
+    @property
+    def shipyard_owner(self) -> np.ndarray:
+        return self._view("shipyard_owner")
+
+    @property
+    def shipyard_ships(self) -> np.ndarray:
+        return self._view("shipyard_ships")
+
+    @property
+    def fleet_owner(self) -> np.ndarray:
+        return self._view("fleet_owner")
+
+    @property
+    def fleet_ships(self) -> np.ndarray:
+        return self._view("fleet_ships")
+
+    @property
+    def player_kore(self) -> np.ndarray:
+        return self._view("player_kore")
+
+    @property
+    def shipyard_count(self) -> np.ndarray:
+        return self._view("shipyard_count")
+
+    @property
+    def field_kore(self) -> np.ndarray:
+        """average kore of cells without shipyard"""
+        return self._view("field_kore")
+
+    @property
+    def direct_damage(self) -> np.ndarray:
+        return self._view("direct_damage")
+
+    @property
+    def adjacent_damage(self) -> np.ndarray:
+        return self._view("adjacent_damage")
+
+    @property
+    def reachable_damage(self) -> np.ndarray:
+        if self._reachable is None:
+            self._reachable = np.maximum.accumulate(self.direct_damage + self.adjacent_damage, axis=0)
+        return self._reachable
+
@@ -0,0 +1,80 @@
+# 到達時間マップ
+
+import numpy as np
+from typing import List, Sequence
+from board import Board
+from helpers import max_ships_to_spawn
+from piece import Shipyard
+from point import Point
+
+class Territory:
+    """
+    reach-time map of the current board, answers check_fleet_attacked for many cells at once
+    reach: distance from each cell (by Point.index) to the closest shipyard of the player (size if none)
+    power: ships the opponent's closest shipyard can hold when its fleet arrives, indexed [shipyard, arrival turn]
+        garrison of the simulated turn (current board at turn 0, total_turn after it) plus ships spawnable until then
+    """
+    def __init__(self, board: Board, shipyard_ships: np.ndarray, total_turn: int):
+        """shipyard_ships: FutureTensors.shipyard_ships over turns 0..total_turn"""
+        field = board.field
+        size = field.size
+        me = board.current_player.player_id
+        opp = board.opponent_player.player_id
+        self._size = size
+        self._total_turn = total_turn
+
+        closest_me, self._reach_me = field._nearest("shipyard", me)
+        closest_opp, self._reach_opp = field._nearest("shipyard", opp)
+        self._reach_me = np.array(self._reach_me, dtype=np.int64)
+        self._reach_opp = np.array(self._reach_opp, dtype=np.int64)
+        # -1 where a player has no closest shipyard
+        self._closest_me = np.array([-1 if shipyard is None else shipyard.point.index for shipyard in closest_me], dtype=np.int64)
+        shipyards: List[Shipyard] = [shipyard for shipyard in field._shipyards if shipyard.player_id == opp]
+        number = {id(shipyard): i for i, shipyard in enumerate(shipyards)}
+        self._closest_opp = np.array([-1 if shipyard is None else number[id(shipyard)] for shipyard in closest_opp], dtype=np.int64)
+
+        # arrival turn = my distance - opponent's distance + 1 < size
+        turns = np.arange(size + 1)
+        rows = np.minimum(turns, len(shipyard_ships) - 1)
+        self._power = np.zeros((len(shipyards), len(turns)), dtype=np.int64)
+        for i, shipyard in enumerate(shipyards):
+            spawn = [0]
+            for t in range(len(turns) - 1):
+                spawn.append(spawn[-1] + max_ships_to_spawn(shipyard.turns_controlled + t))
+            # a shipyard lost in the simulation holds no ships
+            self._power[i] = shipyard_ships[rows, shipyard.x, shipyard.y] + spawn
+            self._power[i, 0] = shipyard.ship_count
+
+    @property
+    def total_turn(self) -> int:
+        return self._total_turn
+
+    @property
+    def reach_me(self) -> np.ndarray:
+        return self._reach_me
+
+    @property
+    def reach_opp(self) -> np.ndarray:
+        return self._reach_opp
+
+    def attacked(self, start: Point, points: Sequence[Point], num_ships: int) -> np.ndarray:
+        """check_fleet_attacked of each point for a fleet of num_ships launched from start"""
+        index = np.array([point.index for point in points], dtype=np.int64)
+        return self.attacked_index(np.int64(start.index), index, np.int64(num_ships))
+
+    def attacked_index(self, start: np.ndarray, index: np.ndarray, num_ships: np.ndarray) -> np.ndarray:
+        """attacked by flat indices, start, index and num_ships are broadcast together"""
+        start, index, num_ships = np.broadcast_arrays(start, index, num_ships)
+        reach_me = self._reach_me[index]
+        reach_opp = self._reach_opp[index]
+        closest_me = self._closest_me[index]
+        closest_opp = self._closest_opp[index]
+
+        # closer to my shipyards (by one more turn if the fleet is not launched from the closest one)
+        safe = np.where(closest_me == start, reach_me < reach_opp, reach_me < reach_opp - 1)
+        turn = Point.distance_matrix(self._size)[start, index] - reach_opp + 1
+        contested = (closest_me != -1) & (closest_opp != -1) & ~safe & (turn >= 0)
+        power = self._power[closest_opp[contested], turn[contested]]
+        attacked = np.zeros(index.shape, dtype=bool)
+        attacked[contested] = num_ships[contested] <= power
+        return attacked
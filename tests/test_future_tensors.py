@@ -0,0 +1,36 @@
+import json
+import os
+import numpy as np
+from board import Board
+from snapshot import FutureTensors
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks", "corpus", "agent_turns.json")
+
+def future_tensors(turns: int) -> FutureTensors:
+    with open(CORPUS) as f:
+        record = json.load(f)[30]
+    board = Board(record["obs"], record["config"])
+    tensors = FutureTensors(board.configuration.size, turns + 1)
+    for turn, future in zip(range(turns + 1), board.next(engine="array")):
+        tensors.add(turn, future)
+    return tensors
+
+def reachable(tensors: FutureTensors) -> np.ndarray:
+    damage = tensors.direct_damage + tensors.adjacent_damage
+    result = damage.copy()
+    for turn in range(1, len(result)):
+        result[turn] = np.maximum(result[turn - 1], damage[turn])
+    return result
+
+def test_reachable_damage_is_running_max():
+    tensors = future_tensors(10)
+    assert tensors.reachable_damage.shape == tensors.direct_damage.shape
+    assert tensors.reachable_damage.any()
+    assert np.array_equal(tensors.reachable_damage, reachable(tensors))
+
+def test_reachable_damage_follows_shift():
+    tensors = future_tensors(10)
+    tensors.reachable_damage
+    tensors.shift()
+    assert np.array_equal(tensors.reachable_damage, reachable(tensors))
+    assert len(tensors.reachable_damage) == 10
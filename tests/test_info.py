@@ -0,0 +1,27 @@
+import json
+import os
+from board import Board
+from board_decorator import lookahead
+
+CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks", "corpus", "agent_turns.json")
+
+def info_of(total_turn: int):
+    with open(CORPUS) as f:
+        record = json.load(f)[30]
+    board = Board(record["obs"], record["config"])
+    return lookahead(board, engine="array", turns=total_turn)
+
+def test_default_turn_is_total_turn():
+    info = info_of(5)
+    assert info.field_kore() == info_of(5).field_kore(turn=5)
+    assert info.player_kore() == info.player_kore(turn=5)
+    assert info.shipyard_count() == info.shipyard_count(turn=5)
+    assert info.future_field() is info.future_field(turn=5)
+    assert info.future_field() is not None
+
+def test_turns_out_of_horizon_are_none():
+    info = info_of(3)
+    assert info.future_field(turn=4) is None
+    assert info.player_kore(turn=4) is None
+    assert info.shipyard_count(turn=4) is None
+    assert info.field_kore(turn=4) is None
@@ -0,0 +1,88 @@
+from typing import List
+from cell import Field
+from configuration import Configuration
+from flight_plan import FlightPlan
+from helpers import max_flight_plan_len_for_ship_count
+from piece import Shipyard
+from plan_enumerator import enumerate_plans
+from point import Point
+
+SIZE = 7
+SHIP_COUNT = 13
+
+def small_field() -> Field:
+    field = Field(SIZE)
+    config = Configuration({"size": SIZE})
+    for i, (x, y) in enumerate([(1, 1), (4, 1), (1, 5)]):
+        shipyard = Shipyard(f"{i}", 0, x, y, 10, 0, config)
+        field[x, y]._shipyard = shipyard
+        field._shipyards.append(shipyard)
+    return field
+
+def route(plan: FlightPlan) -> tuple:
+    return tuple(point.index for point in plan.flight_plan_route)
+
+def brute_force(start: Point, field: Field, max_len: int, max_turns: int) -> List[FlightPlan]:
+    """every plan of segments (direction and run) and a last direction, in the grammar of enumerate_plans"""
+    plans = []
+    def extend(command: str, last: str, turns: int):
+        for direction in "NESW":
+            if direction != last and len(command) + 1 <= max_len:
+                plans.append(FlightPlan(command + direction, start, field, "ONEWAY"))
+        for direction in "NESW":
+            if direction == last:
+                continue
+            for moves in range(1, max_turns - turns + 1):
+                text = direction + (str(moves - 1) if moves > 1 else "")
+                if len(command) + len(text) + 1 > max_len:
+                    break
+                extend(command + text, direction, turns + moves)
+    extend("", "", 0)
+    return plans
+
+def dominance(found: tuple) -> tuple:
+    return frozenset(found[1:]), found[-1]
+
+def test_plans_cover_brute_force():
+    field = small_field()
+    start = Point(1, 1, SIZE)
+    max_len = max_flight_plan_len_for_ship_count(SHIP_COUNT)
+    shipyards = field.shipyard_layout()
+    for returning in (False, True):
+        plans = list(enumerate_plans(start, field, SHIP_COUNT, limit=10 ** 6, returning=returning))
+        routes = [route(plan) for plan in plans]
+        assert plans
+        assert all(len(plan.command) <= max_len and "C" not in plan.command for plan in plans)
+        # dedup: one plan per route, and none dominated by an earlier one (same cells and end, no more turns)
+        assert len(set(routes)) == len(routes)
+        shortest = {}
+        for r in routes:
+            assert shortest.get(dominance(r), len(r) + 1) > len(r)
+            shortest[dominance(r)] = len(r)
+        if returning:
+            assert all(r[-1] in shipyards for r in routes)
+
+        expected = [route(plan) for plan in brute_force(start, field, max_len, SIZE)]
+        if returning:
+            expected = [r for r in expected if r[-1] in shipyards]
+        assert set(routes) <= set(expected)
+        assert all(shortest.get(dominance(r), len(r) + 1) <= len(r) for r in expected)
+
+def test_limit_is_a_prefix():
+    field = small_field()
+    start = Point(1, 1, SIZE)
+    commands = [plan.command for plan in enumerate_plans(start, field, SHIP_COUNT, limit=10 ** 6)]
+    assert len(commands) > 10
+    assert list(enumerate_plans(start, field, SHIP_COUNT, limit=0)) == []
+    for limit in (1, 10, len(commands), len(commands) + 5):
+        assert [plan.command for plan in enumerate_plans(start, field, SHIP_COUNT, limit=limit)] == commands[:limit]
+
+def test_max_len_follows_ship_count():
+    field = small_field()
+    start = Point(1, 1, SIZE)
+    for ship_count in (1, 2, 3, 8, 21):
+        max_len = max_flight_plan_len_for_ship_count(ship_count)
+        plans = list(enumerate_plans(start, field, ship_count, limit=10 ** 6))
+        assert plans
+        assert max(len(plan.command) for plan in plans) <= max_len
+        assert len(plans) == len({route(plan) for plan in plans})
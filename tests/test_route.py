@@ -0,0 +1,28 @@
+from cell import Field, Route
+from point import Point
+
+def expected(start: Point, directions: str):
+    cells = [(start.x, start.y)]
+    for direction in directions:
+        dx, dy = {"N": (0, -1), "E": (1, 0), "S": (0, 1), "W": (-1, 0)}[direction]
+        x, y = cells[-1]
+        cells.append(((x + dx) % start._size, (y + dy) % start._size))
+    return cells
+
+def test_route_cache_separates_board_sizes():
+    # Point(2, 3, 21) == Point(2, 3, 8), the cache must not return a route of another size
+    for size in (21, 8, 20, 21, 8):
+        start = Point(2, 3, size)
+        route = Route.from_str(start, Field(size), "W", None)
+        tail = 1 + (size - 1 + 1) // 2
+        assert [(point.x, point.y) for point in route] == expected(start, "W" * tail)
+        assert all(point._size == size for point in route)
+
+def test_route_of_long_runs_is_bounded():
+    # a run of 10 ** 7 moves ends where a run of 4 * 21 + 10 ** 7 % 21 moves ends
+    size = 21
+    start = Point(2, 3, size)
+    route = Route.from_str(start, Field(size), "N9999999E99999999999999", None)
+    assert len(route) <= 2 * 5 * size + size
+    same = Route.from_str(start, Field(size), f"N{4 * size + 10 - 1}E{4 * size + 16 - 1}", None)
+    assert route.route_cell == same.route_cell